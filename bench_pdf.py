@@ -0,0 +1,39 @@
+"""
+시험지 PDF 렌더러 벤치마크 (platypus vs canvas)
+
+사용법: python bench_pdf.py [단어 수] [반복 횟수]
+예) Day121, 하루 30단어 누적 시험지 크기: python bench_pdf.py 400 5
+"""
+import sys
+import time
+
+from exam_pdf import make_pdf
+
+
+def make_sample_exam(n_words):
+    words = [f"word{i} / 단어{i}" if i % 7 == 0 else f"word{i}" for i in range(n_words)]
+    days = [121, 120, 118, 114, 107, 91, 61, 1]
+    day_word_counts = {d: n_words // len(days) for d in days}
+    return words, day_word_counts, "오늘도 화이팅!"
+
+
+def bench(renderer, words, day_word_counts, message, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        pdf = make_pdf(words, day_word_counts, message, renderer=renderer)
+        timings.append(time.perf_counter() - start)
+    return min(timings), sum(timings) / len(timings), len(pdf.getvalue())
+
+
+if __name__ == "__main__":
+    n_words = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    words, day_word_counts, message = make_sample_exam(n_words)
+
+    print(f"단어 {n_words}개, {repeat}회 반복")
+    for renderer in ("platypus", "canvas"):
+        best, mean, size = bench(renderer, words, day_word_counts, message, repeat)
+        print(
+            f"{renderer:>9}: 최소 {best * 1000:7.1f}ms, 평균 {mean * 1000:7.1f}ms, {size / 1024:.0f}KB"
+        )
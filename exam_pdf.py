@@ -0,0 +1,1279 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import re
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import CancelledError, Future, InvalidStateError
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from io import BytesIO
+from weakref import WeakKeyDictionary
+import numpy as np
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont, TTFontFace
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Flowable
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib import colors
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen import canvas
+import reportlab
+
+# ------------------------
+# 폰트 등록
+# ------------------------
+# 큰 한글 TTF를 파싱하는 데 시간이 걸리므로 import 시점이 아니라 첫 PDF를 만들 때 등록하고,
+# 파싱한 결과는 FONT_CACHE_DIR에 저장해 두었다가 다음 프로세스에서 그대로 불러온다.
+# (이미지 빌드 때 python prepare_fonts.py 로 미리 만들어 둔다)
+FONT_FILES = {
+    "NotoSansKRBold": "./fonts/NotoSansKR-Bold.ttf",
+    "NotoSansKRLight": "./fonts/NotoSansKR-Light.ttf",
+    # "NanumGothicExtraBold": "./fonts/NanumGothic-ExtraBold.ttf",
+    # "NanumGothic": "./fonts/NanumGothic-Regular.ttf",
+}
+FONT_CACHE_DIR = os.environ.get("FONT_CACHE_DIR", "./fonts/cache")
+# 1이면 시험지에 쓰는 한글/라틴 글리프만 남긴 서브셋 폰트를 만들어 사용 (fontTools 필요)
+FONT_SUBSET = os.environ.get("FONT_SUBSET", "0") == "1"
+FONT_SUBSET_UNICODES = (
+    list(range(0x20, 0x7F))  # 기본 라틴
+    + list(range(0xA0, 0x180))  # 라틴-1 보충, 라틴 확장-A
+    + list(range(0x2000, 0x2070))  # 일반 문장 부호
+    + list(range(0x3000, 0x3040))  # CJK 기호
+    + list(range(0x3130, 0x3190))  # 한글 호환 자모
+    + list(range(0xAC00, 0xD7A4))  # 한글 음절
+    + list(range(0xFF00, 0xFFF0))  # 전각 문자
+)
+
+_fonts_lock = threading.Lock()
+_fonts_registered = False
+
+
+def get_font_stamp(path):
+    """원본 폰트 파일과 reportlab 버전이 바뀌면 캐시를 다시 만들도록 하는 표식"""
+    stat = os.stat(path)
+    return [reportlab.Version, stat.st_size, int(stat.st_mtime), FONT_SUBSET]
+
+
+def get_font_cache_path(font_name):
+    return os.path.join(FONT_CACHE_DIR, f"{font_name}.pickle")
+
+
+def make_subset_font(font_name, path):
+    """FONT_SUBSET_UNICODES만 남긴 서브셋 TTF를 캐시 폴더에 만들고 경로를 반환"""
+    from fontTools import subset
+
+    subset_path = os.path.join(FONT_CACHE_DIR, f"{font_name}.subset.ttf")
+    options = subset.Options()
+    options.name_IDs = ["*"]
+    font = subset.load_font(path, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=FONT_SUBSET_UNICODES)
+    subsetter.subset(font)
+    subset.save_font(font, subset_path, options)
+    return subset_path
+
+
+def parse_font(font_name, path):
+    """TTF를 파싱해(FONT_SUBSET이면 서브셋 후) TTFont를 반환"""
+    source = path
+    if FONT_SUBSET:
+        try:
+            os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+            source = make_subset_font(font_name, path)
+        except Exception as e:
+            logging.warning(f"서브셋 폰트를 만들지 못했습니다 ({font_name}): {e}")
+    return TTFont(font_name, source)
+
+
+# TTFont 자체는 pickle할 수 없다 (face._pdfScale이 지역 lambda, state가 WeakKeyDictionary).
+# 그래서 둘을 뺀 속성만 저장하고, 불러올 때 unitsPerEm으로 _pdfScale을 다시 만든다.
+# (속성 구성이 reportlab 버전마다 다를 수 있어 get_font_stamp에 버전을 넣어 둔다)
+def get_font_state(font):
+    font_state = {k: v for k, v in vars(font).items() if k not in ("face", "state")}
+    face_state = {k: v for k, v in vars(font.face).items() if k != "_pdfScale"}
+    return font_state, face_state
+
+
+def make_font_from_state(font_state, face_state):
+    """get_font_state()로 저장한 속성에서 다시 파싱하지 않고 TTFont를 만든다"""
+    face = TTFontFace.__new__(TTFontFace)
+    face.__dict__.update(face_state)
+    units_per_em = face.unitsPerEm
+    if units_per_em == 1000:
+        face._pdfScale = lambda x: x
+    else:
+        face._pdfScale = lambda x: x * 1000 / units_per_em
+
+    font = TTFont.__new__(TTFont)
+    font.__dict__.update(font_state)
+    font.face = face
+    font.state = WeakKeyDictionary()
+    return font
+
+
+def save_font_cache(font_name, path, font):
+    """파싱한 TTFont를 캐시 파일로 저장 (실패하면 임시 파일을 지우고 예외를 그대로 올린다)"""
+    os.makedirs(FONT_CACHE_DIR, exist_ok=True)
+    cache_path = get_font_cache_path(font_name)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                (get_font_stamp(path), *get_font_state(font)),
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def prepare_font(font_name, path):
+    """TTF를 파싱해 캐시 파일로 저장하고 TTFont를 반환 (저장에 실패하면 예외)"""
+    font = parse_font(font_name, path)
+    save_font_cache(font_name, path, font)
+    return font
+
+
+def load_font(font_name, path):
+    """캐시가 원본과 맞으면 캐시에서, 아니면 파싱해서 TTFont를 반환"""
+    try:
+        with open(get_font_cache_path(font_name), "rb") as f:
+            stamp, font_state, face_state = pickle.load(f)
+        if stamp == get_font_stamp(path):
+            return make_font_from_state(font_state, face_state), True
+    except Exception:
+        pass
+
+    font = parse_font(font_name, path)
+    try:
+        save_font_cache(font_name, path, font)
+    except Exception as e:
+        # 캐시를 쓸 수 없는 환경(읽기 전용 등)이면 이미 파싱한 폰트를 그대로 쓴다
+        logging.warning(f"폰트 캐시를 만들지 못했습니다 ({font_name}): {e}")
+    return font, False
+
+
+def register_fonts():
+    """처음 한 번만 폰트를 등록 (이후 호출은 바로 반환)"""
+    global _fonts_registered
+    if _fonts_registered:
+        return
+    with _fonts_lock:
+        if _fonts_registered:
+            return
+        for font_name, path in FONT_FILES.items():
+            start = time.perf_counter()
+            font, cached = load_font(font_name, path)
+            pdfmetrics.registerFont(font)
+            logging.info(
+                f"폰트 등록 {font_name}: {(time.perf_counter() - start) * 1000:.0f}ms "
+                f"({'캐시' if cached else '파싱'})"
+            )
+        _fonts_registered = True
+
+
+# ------------------------
+# 이중 컬럼 데이터 만들기 함수
+# ------------------------
+def build_two_column_data(words):
+    """2단 구성 표 데이터를 리스트로 반환"""
+    data = [["번호", "단어", "뜻 쓰기", "번호.", "단어.", "뜻 쓰기."]]
+
+    for i in range(0, len(words), 2):
+        left = words[i]
+        left_row = [i + 1, left, "  "]
+
+        if i + 1 < len(words):
+            right = words[i + 1]
+            right_row = [i + 2, right, "  "]
+        else:
+            right_row = ["", "", ""]
+
+        data.append(left_row + right_row)
+
+    return data
+
+
+# ------------------------
+# PDF 생성 함수
+# ------------------------
+# platypus: Paragraph + Table 로 조판 (기본), canvas: 표 칸을 캔버스에 직접 그리는 빠른 렌더러
+PDF_RENDERER = os.environ.get("PDF_RENDERER", "platypus")
+
+PAGE_MARGIN = 40
+COL_WIDTHS = [33, 90, 130, 34, 90, 130]
+GRID_COLOR = colors.HexColor("#adb5bd")
+HEADER_BACKGROUND = colors.HexColor("#f1f3f5")
+TEXT_COLOR = colors.HexColor("#212529")
+
+
+def make_pdf(words, day_word_counts, message, renderer=None):
+    """PDF_RENDERER(또는 renderer)에 맞는 렌더러로 시험지 PDF를 BytesIO로 만든다"""
+    renderer = renderer or PDF_RENDERER
+    if renderer == "canvas":
+        return make_pdf_canvas(words, day_word_counts, message)
+    return make_pdf_platypus(words, day_word_counts, message)
+
+
+def make_pdf_body(words, day_word_counts, renderer=None):
+    """
+    응원 메시지를 뺀 시험지 본문 PDF를 만들어 (bytes, 메시지 자리)를 반환
+    메시지 자리: (0부터 센 페이지 번호, 메시지 윗변 y) — stamp_message()가 여기에 찍는다
+    """
+    renderer = renderer or PDF_RENDERER
+    if renderer == "canvas":
+        sections = [(get_pdf_title(day_word_counts), words)]
+        buffer, anchor = _make_pdf_sections(sections, day_word_counts, "")
+    else:
+        buffer, anchor = _make_pdf_platypus(words, day_word_counts, "")
+    return buffer.getvalue(), anchor
+
+
+def get_pdf_styles():
+    # 테이블 폰트 스타일 정의
+    styles = getSampleStyleSheet()
+    styles.add(
+        ParagraphStyle(
+            name="Noto",
+            parent=styles["Normal"],
+            fontName="NotoSansKRLight",
+            fontSize=9,
+            textColor=TEXT_COLOR,
+        )
+    )
+    styles.add(
+        ParagraphStyle(
+            name="NotoTitle",
+            parent=styles["Noto"],
+            fontName="NotoSansKRBold",
+            fontSize=24,
+        )
+    )
+    # styles.add(ParagraphStyle(name='Noto', parent=styles['Normal'], fontName='NanumGothic', fontSize=9, textColor=colors.HexColor('#212529')))
+    # styles.add(ParagraphStyle(name='NotoTitle', parent=styles['Noto'], fontName='NanumGothicExtraBold', fontSize=24))
+    styles.add(
+        ParagraphStyle(
+            name="NumStyle",
+            parent=styles["Noto"],
+            alignment=2,  # 번호 오른쪽 정렬 0=left, 1=center, 2=right
+        )
+    )
+    return styles
+
+
+def get_pdf_title(day_word_counts):
+    return "Day" + ",".join(str(d) for d in day_word_counts.keys())
+
+
+def get_counts_text(day_word_counts):
+    return " / ".join([f"day{d}: {cnt}개" for d, cnt in day_word_counts.items()])
+
+
+class FooterAnchor(Flowable):
+    """그려지는 페이지와 y 위치를 기록해 둔다 (응원 메시지를 나중에 찍을 자리)"""
+
+    def __init__(self):
+        super().__init__()
+        self.position = None
+
+    def wrap(self, availWidth, availHeight):
+        return 0, 0
+
+    def draw(self):
+        _, y = self.canv.absolutePosition(0, 0)
+        self.position = (self.canv.getPageNumber() - 1, y)
+
+
+def make_pdf_platypus(words, day_word_counts, message):
+    return _make_pdf_platypus(words, day_word_counts, message)[0]
+
+
+def _make_pdf_platypus(words, day_word_counts, message):
+    register_fonts()
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        pagesize=A4,
+        leftMargin=PAGE_MARGIN,
+        rightMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN,
+    )
+    styles = get_pdf_styles()
+    num_style = styles["NumStyle"]
+
+    story = []
+
+    # ------------------------
+    # 시험지 타이틀
+    # ------------------------
+
+    pdf_title = get_pdf_title(day_word_counts)
+    story.append(Paragraph(pdf_title, styles["NotoTitle"]))
+    story.append(Spacer(1, 26))
+
+    # Day별 문제 수 표시
+    counts_text = get_counts_text(day_word_counts)
+    story.append(Paragraph(counts_text, styles["Noto"]))
+    story.append(Spacer(1, 10))
+
+    # ------------------------
+    # 표
+    # ------------------------
+    # 표 데이터
+    data = build_two_column_data(words)
+
+    # 테이블 폰트 스타일
+    data_with_style = [
+        [
+            Paragraph(str(row[0]), num_style),  # 번호 열 우측
+            Paragraph(str(row[1]), styles["Noto"]),  # 단어 왼쪽
+            Paragraph(str(row[2]), styles["Noto"]),  # 뜻 왼쪽
+            Paragraph(str(row[3]), num_style),
+            Paragraph(str(row[4]), styles["Noto"]),
+            Paragraph(str(row[5]), styles["Noto"]),
+        ]
+        for row in data
+    ]
+
+    # 테이블 스타일
+    table = Table(
+        data_with_style,
+        colWidths=COL_WIDTHS,
+        hAlign="LEFT",
+        #   ,rowHeights=[20]+[22]*(len(data)-1)
+    )
+    table.setStyle(
+        TableStyle(
+            [
+                ("GRID", (0, 0), (-1, -1), 0.25, GRID_COLOR),
+                ("BACKGROUND", (0, 0), (-1, 0), HEADER_BACKGROUND),
+                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
+                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+                ("FONTSIZE", (0, 0), (-1, -1), 10),
+                ("TOPPADDING", (0, 1), (-1, -1), 4),
+                ("BOTTOMPADDING", (0, 1), (-1, -1), 4),
+            ]
+        )
+    )
+
+    story.append(table)
+    story.append(Spacer(1, 20))
+    anchor = FooterAnchor()
+    story.append(anchor)
+
+    # ------------------------
+    # 응원 메세지
+    # ------------------------
+    if message:
+        story.append(Paragraph(f"{message}", styles["Noto"]))
+
+    doc.build(story)
+    buffer.seek(0)
+    return buffer, anchor.position
+
+
+# ------------------------
+# 빠른 PDF 생성 함수 (canvas 직접 그리기)
+# ------------------------
+# make_pdf_platypus()와 같은 모양을 만들되, 6×N개의 Paragraph 대신
+# 표 격자는 Form XObject로 한 번만 정의해 재사용하고 단어는 텍스트 객체로 직접 찍는다.
+FRAME_PADDING = 6  # SimpleDocTemplate 프레임의 기본 안쪽 여백
+CELL_PADDING_X = 6  # 표 칸 좌우 여백 (Table 기본값)
+HEADER_PADDING_Y = 3  # 머리 행 위아래 여백 (Table 기본값)
+BODY_PADDING_Y = 4  # 본문 행 위아래 여백 (TOPPADDING/BOTTOMPADDING)
+CELL_FONT = "NotoSansKRLight"
+CELL_FONT_SIZE = 9
+CELL_LEADING = 12
+NUM_COLUMNS = (0, 3)  # 오른쪽 정렬하는 번호 열
+
+
+def get_cell_lines(text, width):
+    """Paragraph처럼 공백을 정리하고 칸 너비에 맞게 줄을 나눈다"""
+    text = " ".join(str(text).split())
+    if not text:
+        return []
+    if pdfmetrics.stringWidth(text, CELL_FONT, CELL_FONT_SIZE) <= width:
+        return [text]
+    return simpleSplit(text, CELL_FONT, CELL_FONT_SIZE, width)
+
+
+def define_grid_form(c, name, row_heights, has_header):
+    """행 높이 목록에 맞는 표 격자를 (0, 0)=왼쪽 위 기준 Form XObject로 정의"""
+    table_width = sum(COL_WIDTHS)
+    table_height = sum(row_heights)
+    c.beginForm(name, lowerx=0, lowery=-table_height, upperx=table_width, uppery=0)
+    if has_header:
+        c.setFillColor(HEADER_BACKGROUND)
+        c.rect(0, -row_heights[0], table_width, row_heights[0], stroke=0, fill=1)
+
+    lines = []
+    row_y = 0
+    for height in [0] + row_heights:
+        row_y -= height
+        lines.append((0, row_y, table_width, row_y))
+    col_x = 0
+    for width in [0] + COL_WIDTHS:
+        col_x += width
+        lines.append((col_x, 0, col_x, -table_height))
+
+    c.setStrokeColor(GRID_COLOR)
+    c.setLineWidth(0.25)
+    c.lines(lines)
+    c.endForm()
+
+
+def get_grid_form_name(row_heights, has_header):
+    key = f"{int(has_header)}:{','.join(map(str, row_heights))}"
+    return "grid_" + hashlib.md5(key.encode()).hexdigest()
+
+
+def draw_cells(c, page_rows, x, table_top):
+    """한 페이지 분량의 행 글자를 하나의 텍스트 객체로 찍는다"""
+    col_x = [x + sum(COL_WIDTHS[:i]) for i in range(len(COL_WIDTHS))]
+    text = c.beginText()
+    text.setFont(CELL_FONT, CELL_FONT_SIZE)
+    text.setFillColor(TEXT_COLOR)
+
+    row_top = table_top
+    for cells, height, padding in page_rows:
+        inner_height = height - 2 * padding
+        for col, lines in enumerate(cells):
+            # VALIGN MIDDLE: 칸 안에서 세로 가운데, 첫 줄 기준선은 글자 크기만큼 아래
+            line_y = (
+                row_top
+                - padding
+                - (inner_height - len(lines) * CELL_LEADING) / 2
+                - CELL_FONT_SIZE
+            )
+            for line in lines:
+                if col in NUM_COLUMNS:
+                    line_width = pdfmetrics.stringWidth(line, CELL_FONT, CELL_FONT_SIZE)
+                    line_x = col_x[col] + COL_WIDTHS[col] - CELL_PADDING_X - line_width
+                else:
+                    line_x = col_x[col] + CELL_PADDING_X
+                text.setTextOrigin(line_x, line_y)
+                text.textOut(line)
+                line_y -= CELL_LEADING
+        row_top -= height
+    c.drawText(text)
+
+
+def get_canvas_rows(words):
+    """표 행마다 (칸별 줄 목록, 행 높이, 위아래 여백)"""
+    rows = []
+    for row_idx, row in enumerate(build_two_column_data(words)):
+        padding = HEADER_PADDING_Y if row_idx == 0 else BODY_PADDING_Y
+        cells = [
+            get_cell_lines(value, width - 2 * CELL_PADDING_X)
+            for value, width in zip(row, COL_WIDTHS)
+        ]
+        n_lines = max(len(lines) for lines in cells)
+        rows.append((cells, n_lines * CELL_LEADING + 2 * padding, padding))
+    return rows
+
+
+def make_pdf_canvas(words, day_word_counts, message):
+    return make_pdf_sections([(get_pdf_title(day_word_counts), words)], day_word_counts, message)
+
+
+def make_pdf_sections(sections, day_word_counts, message):
+    """
+    sections: [(타이틀, words)] 단어 수가 같은 시험지들을 한 PDF에 섹션으로 이어 붙인다
+    행 높이를 섹션끼리 맞춰 격자(Form XObject)를 모든 섹션이 함께 쓰고, 섹션마다 글자만 새로 찍는다
+    """
+    return _make_pdf_sections(sections, day_word_counts, message)[0]
+
+
+def _make_pdf_sections(sections, day_word_counts, message):
+    register_fonts()
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    styles = get_pdf_styles()
+    page_width, page_height = A4
+
+    x0 = PAGE_MARGIN + FRAME_PADDING
+    top = page_height - PAGE_MARGIN - FRAME_PADDING
+    bottom = PAGE_MARGIN + FRAME_PADDING
+    frame_width = page_width - 2 * (PAGE_MARGIN + FRAME_PADDING)
+
+    # 시험지 타이틀, Day별 문제 수, 응원 메세지
+    titles = [Paragraph(title, styles["NotoTitle"]) for title, _ in sections]
+    counts = Paragraph(get_counts_text(day_word_counts), styles["Noto"])
+    footer = Paragraph(f"{message}", styles["Noto"]) if message else None
+    title_height = max(title.wrap(frame_width, top - bottom)[1] for title in titles)
+    counts_height = counts.wrap(frame_width, top - bottom)[1]
+
+    # 표: 행마다 칸별 줄 목록을 구하고, 행 높이는 모든 섹션 중 가장 높은 것으로 맞춘다
+    section_rows = [get_canvas_rows(words) for _, words in sections]
+    if len({len(rows) for rows in section_rows}) > 1:
+        raise ValueError("섹션마다 단어 수가 같아야 합니다.")
+    row_heights = [max(rows[i][1] for rows in section_rows) for i in range(len(section_rows[0]))]
+
+    # 페이지 높이에 맞게 행을 나눈다 (머리 행은 첫 페이지에만)
+    table_top = top - title_height - 26 - counts_height - 10
+    pages = [(table_top, [])]  # [(표 위쪽 y, [행 번호])]
+    y = table_top
+    for row_idx, height in enumerate(row_heights):
+        if pages[-1][1] and y - height < bottom:
+            pages.append((top, []))
+            y = top
+        pages[-1][1].append(row_idx)
+        y -= height
+
+    # 같은 행 높이 구성의 격자는 Form XObject로 한 번만 정의하고 페이지마다 재사용
+    # (폼은 페이지 내용을 그리기 전에 모두 정의해 둔다)
+    form_names = []
+    for page_idx, (_, page_row_ids) in enumerate(pages):
+        page_heights = [row_heights[i] for i in page_row_ids]
+        form_name = get_grid_form_name(page_heights, page_idx == 0)
+        if form_name not in form_names:
+            define_grid_form(c, form_name, page_heights, page_idx == 0)
+        form_names.append(form_name)
+
+    footer_height = footer.wrap(frame_width, top - bottom)[1] if footer else 0
+    for title, rows in zip(titles, section_rows):
+        title.drawOn(c, x0, top - title.height)
+        counts.drawOn(c, x0, top - title_height - 26 - counts_height)
+        for page_idx, ((page_top, page_row_ids), form_name) in enumerate(zip(pages, form_names)):
+            if page_idx > 0:
+                c.showPage()
+            c.saveState()
+            c.translate(x0, page_top)
+            c.doForm(form_name)
+            c.restoreState()
+            page_rows = [(rows[i][0], row_heights[i], rows[i][2]) for i in page_row_ids]
+            draw_cells(c, page_rows, x0, page_top)
+
+        # 응원 메세지
+        footer_y = y - 20
+        anchor = (c.getPageNumber() - 1, footer_y)
+        if footer:
+            if footer_y - footer_height < bottom:
+                c.showPage()
+                footer_y = top
+            footer.drawOn(c, x0, footer_y - footer_height)
+        c.showPage()
+
+    c.save()
+    buffer.seek(0)
+    return buffer, anchor
+
+
+# ------------------------
+# 유형별(A/B/C) 시험지
+# ------------------------
+# 같은 단어 묶음을 유형마다 다른 순서로 섞어 옆 사람과 답이 겹치지 않게 한다
+VARIANT_LABELS = "ABCDE"
+
+
+def make_variant_words(words, n_variants, seed):
+    """seed로 정해지는 n_variants개의 순서를 한 번에 만들어 유형별 단어 목록으로 반환"""
+    rng = np.random.default_rng(seed)
+    orders = rng.permuted(np.tile(np.arange(len(words)), (n_variants, 1)), axis=1)
+    words = np.asarray(words, dtype=object)
+    return [words[order].tolist() for order in orders]
+
+
+def get_variant_sections(words, day_word_counts, n_variants, seed):
+    if not 1 <= n_variants <= len(VARIANT_LABELS):
+        raise ValueError(f"유형은 1~{len(VARIANT_LABELS)}개까지 만들 수 있습니다.")
+    title = get_pdf_title(day_word_counts)
+    return [
+        (f"{title} ({label}형)", variant)
+        for label, variant in zip(VARIANT_LABELS, make_variant_words(words, n_variants, seed))
+    ]
+
+# ------------------------
+# 응원 메시지 덧찍기
+# ------------------------
+# 메시지를 고칠 때마다 제목과 표 전체를 다시 조판하지 않도록, 메시지를 뺀 본문을 캐시해 두고
+# 메시지만 한 장짜리 PDF로 만들어 본문의 메시지 자리에 겹친다.
+def stamp_message(body_bytes, anchor, message):
+    """make_pdf_body()의 본문에 응원 메시지를 찍은 PDF bytes를 반환"""
+    if not message:
+        return body_bytes
+    from pypdf import PdfReader, PdfWriter
+
+    register_fonts()
+    page_width, page_height = A4
+    x0 = PAGE_MARGIN + FRAME_PADDING
+    top = page_height - PAGE_MARGIN - FRAME_PADDING
+    bottom = PAGE_MARGIN + FRAME_PADDING
+    frame_width = page_width - 2 * (PAGE_MARGIN + FRAME_PADDING)
+
+    footer = Paragraph(f"{message}", get_pdf_styles()["Noto"])
+    footer_height = footer.wrap(frame_width, top - bottom)[1]
+    page_idx, y = anchor
+    writer = PdfWriter(clone_from=PdfReader(BytesIO(body_bytes)))
+    if y - footer_height < bottom:
+        # 마지막 페이지에 자리가 없으면 새 페이지 맨 위에 찍는다
+        writer.add_blank_page(page_width, page_height)
+        page_idx, y = len(writer.pages) - 1, top
+
+    overlay = BytesIO()
+    c = canvas.Canvas(overlay, pagesize=A4)
+    footer.drawOn(c, x0, y - footer_height)
+    c.showPage()
+    c.save()
+    overlay.seek(0)
+    writer.pages[page_idx].merge_page(PdfReader(overlay).pages[0])
+
+    buffer = BytesIO()
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+# ------------------------
+# PDF 렌더링 프로세스 풀
+# ------------------------
+# ReportLab 조판은 순수 파이썬이라 GIL을 잡고 있으므로, 큰 시험지를 스크립트 스레드에서 만들면
+# 같은 인스턴스의 다른 세션이 모두 기다리게 된다. 폰트를 미리 등록해 둔 작업 프로세스에서 만든다.
+# PDF_WORKERS=0 이면 예전처럼 호출한 스레드에서 바로 만든다.
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", os.cpu_count() or 1))
+# 동시에 맡길 수 있는 작업 수 (실행 중 + 대기 중), 넘으면 자리가 날 때까지 기다린다
+PDF_QUEUE_SIZE = int(os.environ.get("PDF_QUEUE_SIZE", max(PDF_WORKERS, 1) * 2))
+PDF_QUEUE_TIMEOUT_SEC = float(os.environ.get("PDF_QUEUE_TIMEOUT_SEC", 10))
+
+
+class PdfQueueFullError(RuntimeError):
+    """PDF 작업 대기열이 가득 차 제한 시간 안에 자리가 나지 않았을 때"""
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_pool_slots = threading.BoundedSemaphore(PDF_QUEUE_SIZE)
+
+
+def _render_pdf_bytes(words, day_word_counts, message, renderer):
+    # 작업 프로세스에서 실행 (pickle 가능하도록 모듈 최상위 함수)
+    return make_pdf(words, day_word_counts, message, renderer).getvalue()
+
+
+def _render_pdf_body(words, day_word_counts, renderer):
+    return make_pdf_body(words, day_word_counts, renderer)
+
+
+def _render_stamped(body_bytes, anchor, message):
+    return stamp_message(body_bytes, anchor, message)
+
+
+def _render_sections_bytes(sections, day_word_counts, message):
+    return make_pdf_sections(sections, day_word_counts, message).getvalue()
+
+
+def _warm_up():
+    return os.getpid()
+
+
+def get_pdf_pool():
+    """spawn 방식의 작업 프로세스 풀을 한 번만 만들고, 모든 작업 프로세스를 미리 띄워 둔다"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 스레드가 많은 Streamlit 프로세스를 fork하지 않도록 spawn 사용
+            _pool = ProcessPoolExecutor(
+                max_workers=PDF_WORKERS,
+                mp_context=get_context("spawn"),
+                initializer=register_fonts,
+            )
+            for _ in range(PDF_WORKERS):
+                _pool.submit(_warm_up)
+        return _pool
+
+
+def _reset_pdf_pool(pool):
+    global _pool
+    with _pool_lock:
+        if _pool is pool:
+            _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def submit_pdf(words, day_word_counts, message, renderer=None):
+    """
+    PDF 작업을 풀에 맡기고 PDF bytes를 돌려줄 Future를 반환
+    대기열이 가득 차면 PDF_QUEUE_TIMEOUT_SEC까지 기다린 뒤 PdfQueueFullError
+    """
+    args = (list(words), dict(day_word_counts), message, renderer or PDF_RENDERER)
+    return _submit(_render_pdf_bytes, args)
+
+
+def submit_pdf_body(words, day_word_counts, renderer=None):
+    """make_pdf_body()를 풀에 맡기고 (본문 bytes, 메시지 자리)를 돌려줄 Future를 반환"""
+    args = (list(words), dict(day_word_counts), renderer or PDF_RENDERER)
+    return _submit(_render_pdf_body, args)
+
+
+def submit_stamped(body, message):
+    """본문 (bytes, 메시지 자리)에 stamp_message()를 풀에서 실행하고 Future를 반환 (메시지가 없으면 본문 그대로)"""
+    if not message:
+        future = Future()
+        future.set_result(body[0])
+        return future
+    return _submit(_render_stamped, (*body, message))
+
+
+def submit_sections_pdf(sections, day_word_counts, message):
+    """make_pdf_sections()를 풀에 맡기고 Future를 반환 (submit_pdf와 같은 대기열을 쓴다)"""
+    args = ([(title, list(words)) for title, words in sections], dict(day_word_counts), message)
+    return _submit(_render_sections_bytes, args)
+
+
+def _submit(fn, args):
+    if PDF_WORKERS <= 0:
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    if not _pool_slots.acquire(timeout=PDF_QUEUE_TIMEOUT_SEC):
+        raise PdfQueueFullError("PDF를 만드는 요청이 많습니다. 잠시 후 다시 시도해주세요.")
+    pool = get_pdf_pool()
+    try:
+        future = pool.submit(fn, *args)
+    except BrokenProcessPool:
+        _pool_slots.release()
+        _reset_pdf_pool(pool)
+        raise
+    except Exception:
+        _pool_slots.release()
+        raise
+    future.add_done_callback(lambda _: _pool_slots.release())
+    return future
+
+
+def _reset_current_pool():
+    logging.warning("PDF 작업 프로세스 풀이 중단되어 다시 시작합니다.")
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        _reset_pdf_pool(pool)
+
+
+def _result_with_retry(submit):
+    try:
+        return submit().result()
+    except BrokenProcessPool:
+        _reset_current_pool()
+        return submit().result()
+
+
+# 완료 콜백은 풀의 결과 처리 스레드에서 불리므로, 거기서 대기열 자리를 기다리며 다음 작업을
+# 맡기면 다른 작업의 완료(자리 반납)까지 막힌다. 이어서 맡기는 일은 이 스레드가 한다.
+_followup_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="voca-pdf-followup")
+
+
+def _set_future(future, f):
+    """끝난 Future f의 결과/예외/취소를 future에 옮긴다 (future가 이미 취소됐으면 무시)"""
+    try:
+        if f.cancelled():
+            future.cancel()
+        elif f.exception() is not None:
+            future.set_exception(f.exception())
+        else:
+            future.set_result(f.result())
+    except InvalidStateError:
+        pass
+
+
+def _chain(first, then, owns_first=False):
+    """
+    first가 끝나면 then(first)로 다음 작업의 Future를 받아, 그 결과를 돌려줄 Future를 반환
+    then이 None을 반환하면 first의 결과를 그대로 쓴다
+    반환한 Future를 취소하면 다음 작업도 취소한다 (owns_first면 first도, 실행 중이면 결과만 버린다)
+    """
+    future = Future()
+    current = [first if owns_first else None]
+
+    def step(f):
+        if future.done():
+            return
+        try:
+            following = then(f)
+        except BaseException as e:
+            try:
+                future.set_exception(e)
+            except InvalidStateError:
+                pass
+            return
+        if following is None:
+            _set_future(future, f)
+            return
+        current[0] = following
+        if future.cancelled():
+            following.cancel()
+        following.add_done_callback(lambda g: _set_future(future, g))
+
+    def on_cancel(f):
+        if f.cancelled() and current[0] is not None:
+            current[0].cancel()
+
+    future.add_done_callback(on_cancel)
+    first.add_done_callback(lambda f: _followup_pool.submit(step, f))
+    return future
+
+
+def _submit_with_retry(submit):
+    """
+    submit()으로 맡긴 작업의 Future를 반환 (_result_with_retry처럼 기다리지 않는다)
+    풀이 죽어 실패하면(BrokenProcessPool) 풀을 다시 만들어 한 번 더 맡긴다
+    """
+    try:
+        first = submit()
+    except BrokenProcessPool:
+        # _submit()이 이미 죽은 풀을 정리했다
+        first = submit()
+
+    def retry_if_broken(f):
+        if not f.cancelled() and isinstance(f.exception(), BrokenProcessPool):
+            _reset_current_pool()
+            return submit()
+        return None
+
+    return _chain(first, retry_if_broken, owns_first=True)
+
+
+# ------------------------
+# PDF 렌더 캐시
+# ------------------------
+# 시험지 모양(레이아웃)을 바꾸면 올려서 이전에 캐시된 PDF를 쓰지 않도록 한다
+PDF_LAYOUT_VERSION = 2
+# 캐시에 보관할 PDF의 총 바이트 수 (넘으면 가장 오래 안 쓴 것부터 삭제)
+PDF_CACHE_MAX_BYTES = int(os.environ.get("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+PAGE_OBJECT_PATTERN = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+_pdf_cache = OrderedDict()
+_pdf_cache_lock = threading.Lock()
+_pdf_cache_stats = {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0}
+
+
+def get_pdf_key(words, day_word_counts, message, variants=None):
+    """
+    단어 순서, Day별 문제 수, 응원 메시지, 레이아웃 버전(렌더러 포함)으로 만든 내용 해시
+    message=None이면 메시지를 뺀 본문의 키
+    variants: 유형별 시험지면 (유형 수, seed)
+    """
+    key = [
+        PDF_LAYOUT_VERSION,
+        PDF_RENDERER,
+        list(words),
+        list(day_word_counts.items()),
+        message,
+    ]
+    if variants is not None:
+        key.append(list(variants))
+    payload = json.dumps(key, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def get_pdf_cache_stats():
+    with _pdf_cache_lock:
+        return {**_pdf_cache_stats, "entries": len(_pdf_cache)}
+
+
+def render_variants_pdf(words, day_word_counts, message, n_variants, seed):
+    """유형 n_variants개를 섹션으로 담은 PDF bytes를 반환 (캐시는 request_render와 함께 쓴다)"""
+    key = get_pdf_key(words, day_word_counts, message, variants=(n_variants, seed))
+    pdf_bytes = get_cached_pdf(key)
+    if pdf_bytes is not None:
+        return pdf_bytes
+
+    sections = get_variant_sections(words, day_word_counts, n_variants, seed)
+    pdf_bytes = _result_with_retry(
+        lambda: submit_sections_pdf(sections, day_word_counts, message)
+    )
+    put_cached_pdf(key, pdf_bytes)
+    return pdf_bytes
+
+
+def get_pdf_cache_state(words, day_word_counts, message):
+    """완성된 PDF가 캐시에 있으면 "hit", 본문만 있으면 "body", 없으면 "miss" (LRU 순서는 건드리지 않는다)"""
+    with _pdf_cache_lock:
+        if get_pdf_key(words, day_word_counts, message) in _pdf_cache:
+            return "hit"
+        if get_pdf_key(words, day_word_counts, None) in _pdf_cache:
+            return "body"
+        return "miss"
+
+
+def get_page_count(pdf_bytes):
+    """PDF를 파싱하지 않고 페이지 객체 수를 센다 (로그용 대략값)"""
+    return len(PAGE_OBJECT_PATTERN.findall(pdf_bytes))
+
+
+def get_cached_pdf(key):
+    with _pdf_cache_lock:
+        pdf_bytes = _pdf_cache.get(key)
+        if pdf_bytes is not None:
+            _pdf_cache.move_to_end(key)
+            _pdf_cache_stats["hits"] += 1
+        else:
+            _pdf_cache_stats["misses"] += 1
+        return pdf_bytes
+
+
+def get_cached_size(value):
+    # 본문 캐시는 (bytes, 메시지 자리) 튜플
+    return len(value if isinstance(value, bytes) else value[0])
+
+
+def put_cached_pdf(key, value):
+    size = get_cached_size(value)
+    with _pdf_cache_lock:
+        if key not in _pdf_cache and size <= PDF_CACHE_MAX_BYTES:
+            _pdf_cache[key] = value
+            _pdf_cache_stats["bytes"] += size
+            while _pdf_cache_stats["bytes"] > PDF_CACHE_MAX_BYTES:
+                _, evicted = _pdf_cache.popitem(last=False)
+                _pdf_cache_stats["bytes"] -= get_cached_size(evicted)
+                _pdf_cache_stats["evictions"] += 1
+
+
+# ------------------------
+# 세션별 최신 작업만 남기는 렌더 작업 관리
+# ------------------------
+# 셔플/미리보기를 연달아 누르면 아무도 받지 않을 PDF 작업이 쌓이므로,
+# 세션마다 가장 최근 요청(generation)만 기억하고 이전 작업은 취소하거나 결과를 버린다.
+RENDER_JOB_TTL_SEC = 300  # 끝난 뒤 아무도 가져가지 않은 작업을 정리하는 시간
+
+_render_jobs = {}  # {session_id: {"generation", "key", "future", "created_at"}}
+_render_jobs_lock = threading.Lock()
+_render_jobs_stats = {"requested": 0, "superseded": 0, "cancelled": 0, "delivered": 0}
+
+
+def get_render_job_stats():
+    with _render_jobs_lock:
+        return {**_render_jobs_stats, "sessions": len(_render_jobs)}
+
+
+def _prune_render_jobs(now):
+    for session_id, job in list(_render_jobs.items()):
+        if job["future"].done() and now - job["created_at"] > RENDER_JOB_TTL_SEC:
+            del _render_jobs[session_id]
+
+
+def request_render(session_id, words, day_word_counts, message):
+    """
+    세션의 최신 PDF 작업을 등록하고 generation 번호를 반환
+    같은 내용의 작업이 이미 있으면 그대로 쓰고, 다른 내용이면 이전 작업을 밀어낸다
+    """
+    key = get_pdf_key(words, day_word_counts, message)
+    with _render_jobs_lock:
+        job = _render_jobs.get(session_id)
+        # 실패하거나 취소된 작업은 다시 쓰지 않고 새로 맡긴다
+        if job is not None and job["key"] == key and _is_reusable(job["future"]):
+            return job["generation"]
+        generation = job["generation"] + 1 if job is not None else 1
+
+    # 메시지만 바뀌었으면 진행 중인(또는 캐시된) 본문을 그대로 쓰고 메시지만 덧찍는다
+    body_key = get_pdf_key(words, day_word_counts, None)
+    body_future = None
+    pdf_bytes = get_cached_pdf(key)
+    if pdf_bytes is not None:
+        future = Future()
+        future.set_result(pdf_bytes)
+    else:
+        old_body = job["body_future"] if job is not None and job["body_key"] == body_key else None
+        if old_body is not None and not old_body.done():
+            body_future = old_body
+        else:
+            body_future = _get_body_future(body_key, words, day_word_counts)
+        future = _stamp_when_done(body_future, key, message)
+
+    now = time.time()
+    with _render_jobs_lock:
+        old = _render_jobs.get(session_id)
+        if old is not None and old["generation"] >= generation:
+            # 그 사이 같은 세션에서 더 새로운 요청이 들어왔으면 이 작업이 밀려난다
+            generation = old["generation"] + 1
+        if old is not None and not old["future"].done():
+            _render_jobs_stats["superseded"] += 1
+            old["future"].cancel()
+            # 본문이 다르고 아직 대기열에 있으면 실행되지 않도록 취소 (실행 중이면 결과만 버린다)
+            old_body = old["body_future"]
+            if old_body is not None and old_body is not body_future and old_body.cancel():
+                _render_jobs_stats["cancelled"] += 1
+        _render_jobs[session_id] = {
+            "generation": generation,
+            "key": key,
+            "future": future,
+            "body_key": body_key,
+            "body_future": body_future,
+            "created_at": now,
+        }
+        _render_jobs_stats["requested"] += 1
+        _prune_render_jobs(now)
+    return generation
+
+
+def _is_reusable(future):
+    return not future.done() or (not future.cancelled() and future.exception() is None)
+
+
+def _get_body_future(body_key, words, day_word_counts):
+    body = get_cached_pdf(body_key)
+    if body is not None:
+        future = Future()
+        future.set_result(body)
+        return future
+    future = _submit_with_retry(lambda: submit_pdf_body(words, day_word_counts))
+    future.add_done_callback(
+        lambda f: put_cached_pdf(body_key, f.result())
+        if not f.cancelled() and f.exception() is None
+        else None
+    )
+    return future
+
+
+def _stamp_when_done(body_future, key, message):
+    """
+    본문이 나오면 메시지를 덧찍어 PDF bytes를 돌려줄 Future
+    덧찍기(pypdf)도 GIL을 오래 잡으므로 Streamlit 프로세스가 아니라 작업 프로세스에서 한다
+    """
+
+    def stamp(f):
+        if f.cancelled() or f.exception() is not None:
+            return None
+        body = f.result()
+        return _submit_with_retry(lambda: submit_stamped(body, message))
+
+    future = _chain(body_future, stamp)
+    future.add_done_callback(
+        lambda f: put_cached_pdf(key, f.result())
+        if not f.cancelled() and f.exception() is None
+        else None
+    )
+    return future
+
+
+def wait_for_render(session_id, generation, poll=None, interval=0.1):
+    """
+    generation 작업의 PDF bytes를 기다려 반환, 그 사이 더 새로운 작업에 밀려나면 None
+    poll: 기다리는 동안 interval마다 호출 (Streamlit이 새 rerun 요청을 처리할 수 있도록)
+    """
+    while True:
+        with _render_jobs_lock:
+            job = _render_jobs.get(session_id)
+        if job is None or job["generation"] != generation:
+            return None
+        try:
+            pdf_bytes = job["future"].result(timeout=interval)
+        except FutureTimeoutError:
+            if poll:
+                poll()
+            continue
+        except CancelledError:
+            # 더 새로운 작업에 밀려 취소된 것이면 None, 아니면(풀 재시작 등) 그대로 올린다
+            with _render_jobs_lock:
+                if _render_jobs.get(session_id) is not job:
+                    return None
+            raise
+        with _render_jobs_lock:
+            if _render_jobs.get(session_id) is not job:
+                return None
+            _render_jobs_stats["delivered"] += 1
+        return pdf_bytes
+
+
+# ------------------------
+# 여러 Day 시험지 묶음
+# ------------------------
+# Day 범위의 시험지를 작업 프로세스에서 나눠 만들고, 끝나는 대로 파일에 써서
+# 묶음 전체를 메모리에 들고 있지 않는다. (렌더 캐시에는 넣지 않는다)
+PACK_FORMATS = ("zip", "pdf")
+PACK_MAX_EXAMS = int(os.environ.get("PDF_PACK_MAX_EXAMS", 120))
+# 세션이 끝나도 남는 묶음/명단 파일은 새로 만들 때 이 시간보다 오래된 것부터 정리한다
+PACK_FILE_TTL_SEC = int(os.environ.get("PDF_PACK_FILE_TTL_SEC", 3600))
+PACK_FILE_PREFIXES = ("voca_pack_", "voca_roster_")
+
+
+def get_pack_path(kind, session_id, ext):
+    """kind: "pack" 또는 "roster", 세션마다 파일 하나만 쓰고 새로 만들 때 덮어쓴다"""
+    return os.path.join(tempfile.gettempdir(), f"voca_{kind}_{session_id}.{ext}")
+
+
+def sweep_pack_files(now=None, directory=None):
+    """임시 폴더에서 PACK_FILE_TTL_SEC보다 오래된 묶음/명단 파일(.tmp 포함)을 지우고 지운 개수를 반환"""
+    now = time.time() if now is None else now
+    directory = directory or tempfile.gettempdir()
+    removed = 0
+    try:
+        names = os.listdir(directory)
+    except OSError:
+        return 0
+    for name in names:
+        if not name.startswith(PACK_FILE_PREFIXES):
+            continue
+        path = os.path.join(directory, name)
+        try:
+            if now - os.path.getmtime(path) > PACK_FILE_TTL_SEC:
+                os.remove(path)
+                removed += 1
+        except OSError:
+            # 다른 세션이 먼저 지웠거나 쓰는 중이면 다음 정리 때 다시 본다
+            continue
+    if removed:
+        logging.info(f"오래된 시험지 묶음 파일 {removed}개 정리")
+    return removed
+
+
+def get_pack_entry_name(day):
+    return f"day{day}_시험지.pdf"
+
+
+def iter_pack_pdfs(exams, message, window=None):
+    """
+    exams: [(day, words, day_word_counts)]
+    순서대로 (day, PDF bytes)를 내보내고, 동시에 window개까지만 작업 프로세스에 맡긴다
+    (대기열을 다 차지해 다른 사용자의 시험지가 밀리지 않도록)
+    """
+    for (day, _, _), pdf_bytes in _iter_in_window(
+        exams, lambda exam: submit_pdf(exam[1], exam[2], message), window
+    ):
+        yield day, pdf_bytes
+
+
+def _iter_in_window(jobs, submit, window=None):
+    """jobs를 순서대로 submit(job)으로 맡기고 (job, 결과)를 내보낸다, 동시에 window개까지만"""
+    window = window or max(PDF_WORKERS, 1)
+    pending = deque()
+    try:
+        for job in jobs:
+            pending.append((job, submit(job)))
+            if len(pending) >= window:
+                job, future = pending.popleft()
+                yield job, future.result()
+        while pending:
+            job, future = pending.popleft()
+            yield job, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def write_exam_pack(exams, out_path, message, fmt="zip", on_progress=None):
+    """
+    여러 Day 시험지를 out_path에 ZIP(Day별 PDF) 또는 PDF 하나로 묶어 저장하고 경로를 반환
+    on_progress(done, total): 시험지 하나를 쓸 때마다 호출
+    """
+    if fmt not in PACK_FORMATS:
+        raise ValueError(f"지원하지 않는 묶음 형식입니다: {fmt}")
+    exams = list(exams)
+    if not exams:
+        raise ValueError("선택한 Day 범위에 만들 시험지가 없습니다.")
+    if len(exams) > PACK_MAX_EXAMS:
+        raise ValueError(f"시험지는 한 번에 {PACK_MAX_EXAMS}개까지 만들 수 있습니다.")
+
+    start = time.perf_counter()
+    tmp_path = out_path + ".tmp"
+    try:
+        if fmt == "zip":
+            # PDF는 이미 압축되어 있으므로 다시 압축하지 않는다
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_STORED) as zf:
+                for done, (day, pdf_bytes) in enumerate(iter_pack_pdfs(exams, message), 1):
+                    zf.writestr(get_pack_entry_name(day), pdf_bytes)
+                    if on_progress:
+                        on_progress(done, len(exams))
+        else:
+            from pypdf import PdfWriter
+
+            writer = PdfWriter()
+            for done, (day, pdf_bytes) in enumerate(iter_pack_pdfs(exams, message), 1):
+                writer.append(BytesIO(pdf_bytes), outline_item=f"Day{day}")
+                if on_progress:
+                    on_progress(done, len(exams))
+            with open(tmp_path, "wb") as f:
+                writer.write(f)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logging.info(
+        f"시험지 묶음 {len(exams)}개 ({fmt}): {(time.perf_counter() - start) * 1000:.0f}ms, "
+        f"{os.path.getsize(out_path) / 1024:.0f}KB"
+    )
+    return out_path
+
+
+# ------------------------
+# 반 명단 시험지
+# ------------------------
+def get_roster_title(name, day_word_counts):
+    return f"{name} · {get_pdf_title(day_word_counts)}"
+
+
+def write_roster_pdf(exams, names, out_path, message, on_progress=None):
+    """
+    exams: [(words, day_word_counts, [명단 순번])] 같은 시험지를 받는 학생 묶음
+    names: 명단 순서대로의 학생 이름
+    묶음마다 학생 수만큼 섹션(머리글에 이름)을 둔 PDF를 작업 프로세스에서 동시에 만들고,
+    명단 순서로 합쳐 out_path에 저장한다
+    """
+    from pypdf import PdfReader, PdfWriter
+
+    if not names:
+        raise ValueError("명단에 학생이 없습니다.")
+    if len(names) > PACK_MAX_EXAMS:
+        raise ValueError(f"시험지는 한 번에 {PACK_MAX_EXAMS}개까지 만들 수 있습니다.")
+
+    def submit(exam):
+        words, day_word_counts, positions = exam
+        sections = [
+            (get_roster_title(names[position], day_word_counts), words)
+            for position in positions
+        ]
+        return submit_sections_pdf(sections, day_word_counts, message)
+
+    # 섹션은 모두 같은 쪽수로 나뉘므로 학생마다 (reader, 시작 쪽, 쪽수)를 기록해 둔다
+    start = time.perf_counter()
+    student_pages = {}
+    for (_, _, positions), pdf_bytes in _iter_in_window(exams, submit):
+        reader = PdfReader(BytesIO(pdf_bytes))
+        n_pages = len(reader.pages) // len(positions)
+        for i, position in enumerate(positions):
+            student_pages[position] = (reader, i * n_pages, n_pages)
+        if on_progress:
+            on_progress(len(student_pages), len(names))
+
+    writer = PdfWriter()
+    for position, name in enumerate(names):
+        reader, first_page, n_pages = student_pages[position]
+        outline_page = len(writer.pages)
+        for page_idx in range(first_page, first_page + n_pages):
+            writer.add_page(reader.pages[page_idx])
+        writer.add_outline_item(name, outline_page)
+
+    tmp_path = out_path + ".tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            writer.write(f)
+        os.replace(tmp_path, out_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    logging.info(
+        f"반 명단 시험지 {len(names)}명 (시험지 {len(exams)}종): "
+        f"{(time.perf_counter() - start) * 1000:.0f}ms, {os.path.getsize(out_path) / 1024:.0f}KB"
+    )
+    return out_path
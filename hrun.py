@@ -5,55 +5,49 @@ import random
 import logging
 import os
 import json
-from google.oauth2.service_account import Credentials
+import uuid
 from google.auth.exceptions import GoogleAuthError
-from io import BytesIO
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib import colors
-
-# NotoSansKR-Regular.ttf 파일을 프로젝트에 넣고 등록
-pdfmetrics.registerFont(TTFont("NotoSansKRBold", "./fonts/NotoSansKR-Bold.ttf"))
-pdfmetrics.registerFont(TTFont("NotoSansKRLight", "./fonts/NotoSansKR-Light.ttf"))
-# pdfmetrics.registerFont(TTFont('NanumGothicExtraBold', './fonts/NanumGothic-ExtraBold.ttf'))
-# pdfmetrics.registerFont(TTFont('NanumGothic', './fonts/NanumGothic-Regular.ttf'))
+from exam_pdf import (
+    PACK_FORMATS,
+    VARIANT_LABELS,
+    PdfQueueFullError,
+    build_two_column_data,
+    get_pack_path,
+    get_page_count,
+    get_pdf_cache_state,
+    get_pdf_key,
+    render_variants_pdf,
+    request_render,
+    sweep_pack_files,
+    wait_for_render,
+    write_exam_pack,
+    write_roster_pdf,
+)
+from voca_data import group_roster, read_roster
+from voca_exam import authorize_from_file, build_exam_pack, get_exam_words, load_vocab
+from voca_events import new_trace, timed, track_user_action
+from voca_metrics import start_metrics_server
 
 # 초기화
 if "words" not in st.session_state:
     st.session_state.words = None
+if "render_session" not in st.session_state:
+    # 세션마다 가장 최근 PDF 작업만 남기기 위한 식별자
+    st.session_state.render_session = uuid.uuid4().hex
 
 
-@st.cache_data
-def load_data():
-    try:
-        # # Sheets와 Drive API 접근에 필요한 권한 범위 정의
-        # SCOPES = [
-        #     "https://www.googleapis.com/auth/spreadsheets.readonly",
-        #     "https://www.googleapis.com/auth/drive.readonly",
-        # ]
-
-        # # 서비스 계정 키의 JSON 내용 가져오기
-        # secrets_json = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
-        # if not secrets_json:
-        #     st.error("❌ GOOGLE_APPLICATION_CREDENTIALS 환경 변수를 찾을 수 없습니다.")
-        #     return None
+def authorize():
+    """서비스 계정 키 파일로 인증된 gspread 클라이언트를 만든다 (프로세스당 한 번)"""
+    return authorize_from_file("voca3000_account_key.json")
 
-        # # JSON 내용으로 자격 증명(Credentials) 객체 생성 및 권한 범위 적용
-        # credentials_info = json.loads(secrets_json)
-        # credentials = Credentials.from_service_account_info(
-        #     credentials_info, scopes=SCOPES
-        # )
 
-        # 권한이 적용된 자격 증명으로 gspread 인증
-        # gc = gspread.authorize(credentials)
-        gc = gspread.service_account("voca3000_account_key.json")
-        worksheet = gc.open("voca_data").sheet1
-        rows = worksheet.get_all_values()
-        df = pd.DataFrame(rows[1:], columns=rows[0])
-        return df
+def load_data():
+    """
+    (df, 단어 인덱스)를 반환, 보여줄 데이터가 없으면 (None, None)
+    마지막으로 성공한 데이터를 바로 돌려주고, TTL이 지나면 백그라운드에서 갱신한다
+    """
+    try:
+        return load_vocab("voca_data", authorize)
 
     except json.JSONDecodeError as e:
         st.error(
@@ -63,241 +57,21 @@ def load_data():
         st.error("❌ 'voca_data_m'라는 이름의 Google Sheets 파일을 찾을 수 없습니다.")
     except GoogleAuthError:
         st.error("❌ Google 인증 오류: 서비스 계정 키를 확인해주세요.")
+    except TimeoutError as e:
+        st.error(f"❌ 데이터 로드 시간 초과: {e}")
     except Exception as e:
         st.error(f"❌ 데이터 로드 오류: {e}")
-    return None
-
-
-# ------------------------
-# 단어 추출 함수
-# ------------------------
-def get_exam_words(df, day, word_per_day):
-    """
-    df: DataFrame (단어 목록, index = 0부터 시작)
-    day: 시험 Day (정수)
-    word_per_day: 하루에 외울 단어 수
-    """
-
-    def get_day_words(d):
-        if d <= 0:
-            return []
-        start_idx = (d - 1) * word_per_day
-        end_idx = start_idx + word_per_day
-        day_rows = df.iloc[start_idx:end_idx]  # 표제어 기준 slice
-
-        words = []
-        for _, row in day_rows.iterrows():
-            # 표제어
-            val = row.get("표제어")
-            if val and str(val).strip():
-                words.append(str(val))
-
-            # 파생어 (쉼표로 구분된 경우)
-            val = row.get("파생어")
-            if val and str(val).strip():
-                derivatives = [
-                    w.strip() for w in str(val).strip("()").split(",") if w.strip()
-                ]
-
-                for w in derivatives:
-                    if w.startswith("/"):
-                        words.append(w.lstrip("/ "))
-                    else:
-                        words.append(w)
-
-            # 쓰기
-            val = row.get("쓰기")
-            if val and str(val).strip():
-                words.append(str(val))
-
-        return words
+    return None, None
 
-    review_offsets = [0, 1, 3, 7, 14, 30, 60, 120]
-
-    all_days = []
-    for i in review_offsets:
-        candidate = day - i
-        if candidate > 0 and candidate < int(len(df)) / word_per_day:
-            all_days.append(candidate)
-        else:
-            continue
-
-    all_words = []
-    day_word_counts = {}
-    for d in all_days:
-        day_words = get_day_words(d)
-        all_words.extend(day_words)
-        day_word_counts[d] = len(day_words)
-
-    return all_words, day_word_counts
-
-
-# ------------------------
-# 이중 컬럼 데이터 만들기 함수
-# ------------------------
-def build_two_column_data(words):
-    """2단 구성 표 데이터를 리스트로 반환"""
-    data = [["번호", "단어", "뜻 쓰기", "번호.", "단어.", "뜻 쓰기."]]
-
-    for i in range(0, len(words), 2):
-        left = words[i]
-        left_row = [i + 1, left, "  "]
-
-        if i + 1 < len(words):
-            right = words[i + 1]
-            right_row = [i + 2, right, "  "]
-        else:
-            right_row = ["", "", ""]
-
-        data.append(left_row + right_row)
-
-    return data
-
-
-# ------------------------
-# 미리보기 마크다운 표 생성 함수
-# ------------------------
-def make_markdown_table(words):
-    data = build_two_column_data(words)
-    # 헤더 행 추가
-    md = "| " + " | ".join(data[0]) + " |\n"
-    md += "|" + " --- |" * len(data[0]) + "\n"
-
-    # 본문 행
-    for row in data[1:]:
-        md += "| " + " | ".join(str(x) for x in row) + " |\n"
-
-    return md
 
 # -------------------------------------------------------------------
-# 사용자 행동을 GCP Cloud Logging에 기록하는 함수
+# 사용자 행동 로그 (GCP Cloud Logging, voca_events.track_user_action)
 # -------------------------------------------------------------------
 # GCP Cloud Logging이 로그를 안정적으로 수집하도록 로깅 레벨 설정
 logging.basicConfig(level=logging.INFO)
+# 지표(/metrics)는 별도 포트에서 내보낸다 (프로세스당 한 번만 띄운다)
+start_metrics_server()
 
-def track_user_action(event_name: str, **event_params):
-    """
-    사용자 행동을 일관된 JSON 형식으로 로깅하여 GCP Cloud Logging에 저장합니다.
-    (timestamp는 GCP가 자동으로 추가합니다.)
-    """
-    log_data = {
-        "event": event_name, 
-        "level": "INFO",
-        "user_params": event_params
-    }
-    
-    # 이 로그 메시지는 GCP Cloud Logging에 자동으로 수집됩니다.
-    logging.info(f"USER_ACTION_TRACKING: {log_data}")
-
-# ------------------------
-# PDF 생성 함수
-# ------------------------
-
-def make_pdf(words, day_word_counts, message):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(
-        buffer,
-        pagesize=A4,
-        leftMargin=40,
-        rightMargin=40,
-        topMargin=40,
-        bottomMargin=40,
-    )
-
-    # 테이블 폰트 스타일 정의
-    styles = getSampleStyleSheet()
-    styles.add(
-        ParagraphStyle(
-            name="Noto",
-            parent=styles["Normal"],
-            fontName="NotoSansKRLight",
-            fontSize=9,
-            textColor=colors.HexColor("#212529"),
-        )
-    )
-    styles.add(
-        ParagraphStyle(
-            name="NotoTitle",
-            parent=styles["Noto"],
-            fontName="NotoSansKRBold",
-            fontSize=24,
-        )
-    )
-    # styles.add(ParagraphStyle(name='Noto', parent=styles['Normal'], fontName='NanumGothic', fontSize=9, textColor=colors.HexColor('#212529')))
-    # styles.add(ParagraphStyle(name='NotoTitle', parent=styles['Noto'], fontName='NanumGothicExtraBold', fontSize=24))
-    num_style = ParagraphStyle(
-        name="NumStyle",
-        parent=styles["Noto"],
-        alignment=2,  # 번호 오른쪽 정렬 0=left, 1=center, 2=right
-    )
-
-    story = []
-
-    # ------------------------
-    # 시험지 타이틀
-    # ------------------------
-
-    pdf_title = "Day" + ",".join(str(d) for d in day_word_counts.keys())
-    story.append(Paragraph(pdf_title, styles["NotoTitle"]))
-    story.append(Spacer(1, 26))
-
-    # Day별 문제 수 표시
-    counts_text = " / ".join([f"day{d}: {cnt}개" for d, cnt in day_word_counts.items()])
-    story.append(Paragraph(counts_text, styles["Noto"]))
-    story.append(Spacer(1, 10))
-
-    # ------------------------
-    # 표
-    # ------------------------
-    # 표 데이터
-    data = build_two_column_data(words)
-
-    # 테이블 폰트 스타일
-    data_with_style = [
-        [
-            Paragraph(str(row[0]), num_style),  # 번호 열 우측
-            Paragraph(str(row[1]), styles["Noto"]),  # 단어 왼쪽
-            Paragraph(str(row[2]), styles["Noto"]),  # 뜻 왼쪽
-            Paragraph(str(row[3]), num_style),
-            Paragraph(str(row[4]), styles["Noto"]),
-            Paragraph(str(row[5]), styles["Noto"]),
-        ]
-        for row in data
-    ]
-
-    # 테이블 스타일
-    table = Table(
-        data_with_style,
-        colWidths=[33, 90, 130, 34, 90, 130],
-        hAlign="LEFT",
-        #   ,rowHeights=[20]+[22]*(len(data)-1)
-    )
-    table.setStyle(
-        TableStyle(
-            [
-                ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#adb5bd")),
-                ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f1f3f5")),
-                ("ALIGN", (0, 0), (-1, 0), "CENTER"),
-                ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                ("FONTSIZE", (0, 0), (-1, -1), 10),
-                ("TOPPADDING", (0, 1), (-1, -1), 4),
-                ("BOTTOMPADDING", (0, 1), (-1, -1), 4),
-            ]
-        )
-    )
-
-    story.append(table)
-    story.append(Spacer(1, 20))
-
-    # ------------------------
-    # 응원 메세지
-    # ------------------------
-    if message:
-        story.append(Paragraph(f"{message}", styles["Noto"]))
-
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
 
 # ------------------------
 # 앱 UI Style 지정
@@ -332,61 +106,279 @@ st.markdown(
     f"<p class='p-it'> 🧠 뇌과학 기반 복습주기에 따른 누적 시험지가 생성됩니다. <br> 📉 에빙하우스의 망각곡선 이론을 참고하여 복습주기는 <b>1,3,7,14,30,60,120일</b>로 세팅하였습니다.🐱 <br>💬 예) <b>Day50</b>시험지 생성: <b>Day50 + Day49,47,43,36,20</b>의 단어가 함께 출제됩니다.</p>",unsafe_allow_html=True)
 
 # 2. 조건 입력 UI
-num_words = st.radio("하루에 몇 개의 단어를 외울 계획인가요?", [15, 20, 30])
-day = st.number_input("Day 몇째날의 시험지를 생성할까요?", min_value=1, step=1, help="복습주기의 단어가 함께 출제 됩니다. 1, 3, 7, 14, 30, 60, 120일 전 학습한 단어")
+# 폼 안의 입력은 "시험지 미리보기"를 누를 때만 반영된다 (값을 고르는 동안에는 rerun하지 않는다)
+with st.form("exam_form", border=False):
+    num_words = st.radio("하루에 몇 개의 단어를 외울 계획인가요?", [15, 20, 30])
+    day = st.number_input("Day 몇째날의 시험지를 생성할까요?", min_value=1, step=1, help="복습주기의 단어가 함께 출제 됩니다. 1, 3, 7, 14, 30, 60, 120일 전 학습한 단어")
+    preview_clicked = st.form_submit_button("시험지 미리보기")
 # 최대 글자 수 설정
 MAX_CHARS = 200
-message = st.text_area("자녀에게 응원의 메시지를 전해요.", "오늘도 화이팅!", max_chars=MAX_CHARS)
-# st.markdown(f"<p style='text-align:right; font-size:0.9rem;margin-top:-10px'>글자 수: {len(message)}/{MAX_CHARS}</p>",unsafe_allow_html=True)
-df = load_data()
+# 이번 실행의 단계별 소요 시간 (사용자 행동 로그에 함께 남긴다)
+trace = new_trace()
+with timed(trace, "load_data") as span:
+    df, index = load_data()
+    span["rows"] = len(df) if df is not None else 0
+    span["outcome"] = "ok" if df is not None else "error"
 # if df is not None:
 #     st.success("✅ 데이터 불러오기 성공!")
 #     st.dataframe(df.head())  # 화면에 데이터 확인
 
-words, day_word_counts = get_exam_words(df, day, num_words)
 
-# 3. 버튼 UI를 한 줄에 배치
-# st.container()을 사용해 버튼을 감싸고, CSS로 내부 정렬을 제어
-with st.container(horizontal=True, horizontal_alignment="left"):
-    # 미리보기 버튼
-    if st.button("시험지 미리보기"):
+def set_exam_words(words, day_word_counts):
+    """시험지 단어를 바꾸고 미리보기 표도 함께 만든다 (표는 단어 순서가 바뀔 때만 다시 만든다)"""
+    st.session_state.words = words
+    st.session_state.day_word_counts = day_word_counts
+    data = build_two_column_data(words)
+    st.session_state.preview_df = pd.DataFrame(data[1:], columns=data[0])
+
+
+# 3. 미리보기 / 셔플 버튼
+if preview_clicked:
+    with timed(trace, "get_exam_words") as span:
+        words, day_word_counts = get_exam_words(index, day, num_words)
+        span["words"] = len(words)
+    random.shuffle(words)
+    st.session_state.exam_day = day
+    with timed(trace, "build_two_column_data"):
+        set_exam_words(words, day_word_counts)
+    track_user_action(
+            event_name="exam_preview_generated",
+            num_words=num_words,
+            day=day,
+            message_length=len(st.session_state.get("message", "")),
+            timings=trace,
+    )
+
+if st.session_state.words is not None:
+    if st.button("셔플"):
+        random.shuffle(st.session_state.words)
+        with timed(trace, "build_two_column_data"):
+            set_exam_words(st.session_state.words, st.session_state.day_word_counts)
         track_user_action(
-                event_name="exam_preview_generated",
-                num_words=num_words,
-                day=day,
-                message_length=len(message)
+            event_name="exam_shuffled",
+            day=day,
+            timings=trace,
         )
-        words, day_word_counts = get_exam_words(df, day, num_words)
-        random.shuffle(words)
-        st.session_state.words = words
-        st.session_state.day_word_counts = day_word_counts
- 
-    # 셔플 버튼
-    if st.session_state.words is not None:
-        if st.button("셔플"):
-            track_user_action(
-                event_name="exam_shuffled",
-                day=day
-            )            
-            random.shuffle(st.session_state.words)
 
-    # PDF 다운로드 버튼
-    if st.session_state.words is not None:
-        pdf_buffer = make_pdf(st.session_state.words, st.session_state.day_word_counts, message)
-        st.download_button(
-            label="📥 PDF 다운로드",
-            data=pdf_buffer,
-            file_name=f"day{day}_시험지.pdf",
-            mime="application/pdf",
-        )
-# 4. 미리표기 표시
+
+# 4. 응원 메시지와 PDF 다운로드 버튼
+# 메시지를 고치면 이 영역만 다시 실행된다 (데이터 조회, 단어 추출, 미리보기 표는 그대로)
+@st.fragment
+def exam_pdf_area():
+    message = st.text_area("자녀에게 응원의 메시지를 전해요.", "오늘도 화이팅!", max_chars=MAX_CHARS, key="message")
+    # st.markdown(f"<p style='text-align:right; font-size:0.9rem;margin-top:-10px'>글자 수: {len(message)}/{MAX_CHARS}</p>",unsafe_allow_html=True)
+    if st.session_state.words is None:
+        return
+
+    # PDF는 "PDF 만들기"를 눌렀을 때만 만든다. 미리보기/셔플로 단어가 바뀌면 다시 눌러야 하므로,
+    # 그 사이의 rerun은 make_pdf()를 부르지 않는다. 메시지만 고치면 캐시된 본문에 메시지만
+    # 덧찍으면 되므로 바로 다시 만든다.
+    body_key = get_pdf_key(st.session_state.words, st.session_state.day_word_counts, None)
+    if st.session_state.get("pdf_body_key") == body_key:
+        try:
+            # 셔플을 연달아 누르면 이전 작업은 취소되고 가장 최근 시험지만 만든다.
+            # 기다리는 동안 상태 표시를 갱신해서 새 클릭의 rerun이 바로 시작되게 한다.
+            pdf_trace = new_trace()
+            with timed(pdf_trace, "make_pdf") as span:
+                span["cache"] = get_pdf_cache_state(
+                    st.session_state.words, st.session_state.day_word_counts, message
+                )
+                generation = request_render(
+                    st.session_state.render_session, st.session_state.words, st.session_state.day_word_counts, message
+                )
+                status = st.empty()
+                pdf_bytes = wait_for_render(
+                    st.session_state.render_session,
+                    generation,
+                    poll=lambda: status.caption("⏳ PDF를 만드는 중..."),
+                )
+                status.empty()
+                if pdf_bytes is not None:
+                    span["pages"] = get_page_count(pdf_bytes)
+                    span["bytes"] = len(pdf_bytes)
+            # 이미 만들어 둔 PDF를 다시 보여주는 rerun은 남기지 않는다
+            if pdf_bytes is not None and span["cache"] != "hit":
+                track_user_action(
+                    event_name="exam_pdf_generated",
+                    day=st.session_state.exam_day,
+                    words=len(st.session_state.words),
+                    timings=pdf_trace,
+                )
+            if pdf_bytes is not None:
+                st.download_button(
+                    label="📥 PDF 다운로드",
+                    data=pdf_bytes,
+                    file_name=f"day{st.session_state.exam_day}_시험지.pdf",
+                    mime="application/pdf",
+                )
+        except PdfQueueFullError as e:
+            st.warning(f"⏳ {e}")
+        except Exception as e:
+            st.error(f"❌ PDF 생성 오류: {e}")
+    elif st.button("📄 PDF 만들기"):
+        st.session_state.pdf_body_key = body_key
+        st.rerun(scope="fragment")
+
+
+exam_pdf_area()
+message = st.session_state.message
+
+# 5. 미리표기 표시
 if st.session_state.words is not None:
     pdf_title = "Day" + ",".join(str(d) for d in st.session_state.day_word_counts.keys())
     st.markdown("### 📋 시험지 미리보기")
     st.markdown(f"### {pdf_title}")
-    # 미리보기 데이터를 pandas DataFrame으로 생성
-    data = build_two_column_data(st.session_state.words)
-    preview_df = pd.DataFrame(data[1:], columns=data[0])
+    # 미리보기 표는 단어가 바뀔 때 set_exam_words()에서 만들어 둔 것을 그대로 쓴다
+    st.dataframe(st.session_state.preview_df, hide_index=True)
 
-    # st.dataframe을 사용하여 표를 표시
-    st.dataframe(preview_df, hide_index=True)
+# 6. 유형별(A/B/C) 시험지
+# 미리보기한 단어를 유형마다 다른 순서로 섞어 한 PDF에 담는다 (같은 시드면 같은 순서)
+if st.session_state.words is not None:
+    if "variant_seed" not in st.session_state:
+        st.session_state.variant_seed = random.randint(1, 9999)
+    with st.expander("🔀 유형별(A/B/C) 시험지 만들기"):
+        with st.container(horizontal=True, horizontal_alignment="left"):
+            n_variants = st.number_input(
+                "유형 수", min_value=2, max_value=len(VARIANT_LABELS), value=3, step=1
+            )
+            variant_seed = st.number_input("시드", min_value=1, step=1, key="variant_seed")
+        variant_key = get_pdf_key(
+            st.session_state.words,
+            st.session_state.day_word_counts,
+            message,
+            variants=(n_variants, variant_seed),
+        )
+        if st.session_state.get("variant_key") == variant_key:
+            try:
+                pdf_bytes = render_variants_pdf(
+                    st.session_state.words,
+                    st.session_state.day_word_counts,
+                    message,
+                    n_variants,
+                    variant_seed,
+                )
+                st.download_button(
+                    label="📥 유형별 시험지 다운로드",
+                    data=pdf_bytes,
+                    file_name=f"day{day}_시험지_{VARIANT_LABELS[:n_variants]}형.pdf",
+                    mime="application/pdf",
+                )
+            except PdfQueueFullError as e:
+                st.warning(f"⏳ {e}")
+            except Exception as e:
+                st.error(f"❌ 유형별 시험지 생성 오류: {e}")
+        elif st.button("🔀 유형별 시험지 만들기"):
+            track_user_action(
+                event_name="exam_variants_generated",
+                day=day,
+                n_variants=n_variants,
+            )
+            st.session_state.variant_key = variant_key
+            st.rerun()
+
+# 7. 여러 Day 시험지 한 번에 만들기
+# Day별 시험지를 작업 프로세스에서 나눠 만들고, 하나씩 임시 파일에 이어 쓴다.
+with st.expander("📚 여러 Day 시험지 한 번에 만들기"):
+    with st.container(horizontal=True, horizontal_alignment="left"):
+        first_day = st.number_input("시작 Day", min_value=1, step=1, key="pack_first_day")
+        last_day = st.number_input("끝 Day", min_value=1, step=1, value=30, key="pack_last_day")
+    pack_format = st.radio(
+        "묶음 형식",
+        PACK_FORMATS,
+        format_func=lambda f: "ZIP (Day별 PDF)" if f == "zip" else "PDF 하나로",
+        horizontal=True,
+    )
+    if first_day > last_day:
+        st.error("❌ 시작 Day가 끝 Day보다 큽니다. Day 범위를 확인해주세요.")
+    elif st.button("📚 시험지 묶음 만들기"):
+        track_user_action(
+            event_name="exam_pack_generated",
+            num_words=num_words,
+            first_day=first_day,
+            last_day=last_day,
+            format=pack_format,
+        )
+        sweep_pack_files()
+        pack_path = get_pack_path("pack", st.session_state.render_session, pack_format)
+        progress = st.progress(0.0, text="⏳ 시험지 묶음을 만드는 중...")
+        try:
+            exams = build_exam_pack(index, first_day, last_day, num_words)
+            write_exam_pack(
+                exams,
+                pack_path,
+                message,
+                fmt=pack_format,
+                on_progress=lambda done, total: progress.progress(
+                    done / total, text=f"⏳ 시험지 묶음을 만드는 중... ({done}/{total})"
+                ),
+            )
+            previous = st.session_state.get("pack")
+            st.session_state.pack = (pack_path, f"day{first_day}-{last_day}_시험지.{pack_format}")
+            # 형식을 바꿔 만들면 이 세션의 이전 묶음 파일은 더 쓰지 않는다
+            if previous and previous[0] != pack_path and os.path.exists(previous[0]):
+                os.remove(previous[0])
+        except PdfQueueFullError as e:
+            st.warning(f"⏳ {e}")
+        except Exception as e:
+            st.error(f"❌ 시험지 묶음 생성 오류: {e}")
+        finally:
+            progress.empty()
+
+    if st.session_state.get("pack") and os.path.exists(st.session_state.pack[0]):
+        pack_path, pack_name = st.session_state.pack
+        with open(pack_path, "rb") as f:
+            st.download_button(
+                label="📥 시험지 묶음 다운로드",
+                data=f,
+                file_name=pack_name,
+                mime="application/zip" if pack_name.endswith(".zip") else "application/pdf",
+            )
+
+# 8. 반 명단 시험지
+# 학생마다 Day가 다를 때 명단 CSV로 한 번에 만든다. 같은 시험지를 받는 학생끼리는 단어 순서와
+# 조판을 함께 쓰고 머리글의 이름만 바꾼다.
+with st.expander("👩‍🏫 반 명단으로 시험지 만들기"):
+    st.caption("name, day, words_per_day 열이 있는 CSV (예: 홍길동,50,20), words_per_day가 없으면 위에서 고른 단어 수")
+    roster_file = st.file_uploader("명단 CSV", type="csv")
+    if roster_file is not None and st.button("👩‍🏫 반 시험지 만들기"):
+        progress = st.progress(0.0, text="⏳ 반 시험지를 만드는 중...")
+        try:
+            roster = read_roster(roster_file, default_words_per_day=num_words)
+            exams = []
+            for (d, wpd), positions in group_roster(roster).items():
+                exam_words, exam_counts = get_exam_words(index, d, wpd)
+                random.shuffle(exam_words)
+                exams.append((exam_words, exam_counts, positions))
+            track_user_action(
+                event_name="exam_roster_generated",
+                n_students=len(roster),
+                n_exams=len(exams),
+            )
+
+            sweep_pack_files()
+            roster_path = get_pack_path("roster", st.session_state.render_session, "pdf")
+            write_roster_pdf(
+                exams,
+                [student["name"] for student in roster],
+                roster_path,
+                message,
+                on_progress=lambda done, total: progress.progress(
+                    done / total, text=f"⏳ 반 시험지를 만드는 중... ({done}/{total}명)"
+                ),
+            )
+            st.session_state.roster_pdf = roster_path
+        except PdfQueueFullError as e:
+            st.warning(f"⏳ {e}")
+        except Exception as e:
+            st.error(f"❌ 반 시험지 생성 오류: {e}")
+        finally:
+            progress.empty()
+
+    if st.session_state.get("roster_pdf") and os.path.exists(st.session_state.roster_pdf):
+        with open(st.session_state.roster_pdf, "rb") as f:
+            st.download_button(
+                label="📥 반 시험지 다운로드",
+                data=f,
+                file_name="반_시험지.pdf",
+                mime="application/pdf",
+            )
@@ -0,0 +1,25 @@
+"""
+PDF 폰트 캐시 준비 (이미지 빌드 시 실행)
+
+사용법: python prepare_fonts.py
+FONT_SUBSET=1 이면 한글/라틴 글리프만 남긴 서브셋 폰트로 캐시를 만든다 (fontTools 필요).
+원본 파싱과 캐시 로드에 걸린 시간을 함께 출력한다.
+"""
+import time
+
+from exam_pdf import FONT_FILES, load_font, prepare_font
+
+if __name__ == "__main__":
+    for font_name, path in FONT_FILES.items():
+        start = time.perf_counter()
+        prepare_font(font_name, path)
+        parse_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        _, cached = load_font(font_name, path)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        print(
+            f"{font_name}: 파싱 {parse_ms:.0f}ms -> 캐시 로드 {load_ms:.0f}ms"
+            f"{'' if cached else ' (캐시 사용 실패)'}"
+        )
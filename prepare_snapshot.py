@@ -0,0 +1,32 @@
+"""
+시트 스냅샷을 이미지에 미리 구워 넣기 (이미지 빌드 시 실행)
+
+사용법: python prepare_snapshot.py --key-file 키.json [--sheet voca_data_m]
+Cloud Run의 파일 시스템은 인스턴스마다 따로이고 메모리에 있으므로, 실행 중에 쓴 스냅샷은
+새 리비전/복제본/콜드 스타트에서 보이지 않는다. 빌드 때 만든 스냅샷으로 바로 시작하고,
+시트가 그 뒤에 수정되었으면 백그라운드 갱신이 따라잡는다.
+키 파일이 없으면 아무것도 하지 않는다 (앱은 첫 요청 때 시트를 읽는다).
+"""
+import argparse
+import os
+import time
+
+from voca_data import SNAPSHOT_DIR, make_fetch
+from voca_exam import SHEET_COLUMNS, authorize_from_file
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="시트 스냅샷 미리 만들기")
+    parser.add_argument("--key-file", required=True, help="서비스 계정 키 파일")
+    parser.add_argument("--sheet", default="voca_data_m", help="Google Sheets 파일 이름")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.key_file):
+        print(f"키 파일이 없어 스냅샷을 만들지 않습니다: {args.key_file}")
+    else:
+        start = time.perf_counter()
+        fetch = make_fetch(args.sheet, lambda: authorize_from_file(args.key_file), SHEET_COLUMNS)
+        df, modified_time, _ = fetch(None)
+        print(
+            f"{args.sheet}: {len(df)}행 -> {SNAPSHOT_DIR} "
+            f"(수정 시각 {modified_time}, {(time.perf_counter() - start) * 1000:.0f}ms)"
+        )
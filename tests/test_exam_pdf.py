@@ -0,0 +1,90 @@
+import os
+import time
+from collections import OrderedDict
+
+import pytest
+
+import exam_pdf
+from exam_pdf import get_cached_pdf, get_pdf_key, put_cached_pdf, sweep_pack_files
+
+
+@pytest.fixture
+def pdf_cache(monkeypatch):
+    """프로세스 전체의 렌더 캐시 대신 비어 있는 캐시로 바꿔 둔다"""
+    monkeypatch.setattr(exam_pdf, "_pdf_cache", OrderedDict())
+    monkeypatch.setattr(exam_pdf, "_pdf_cache_stats", {"hits": 0, "misses": 0, "evictions": 0, "bytes": 0})
+    monkeypatch.setattr(exam_pdf, "PDF_CACHE_MAX_BYTES", 100)
+    return exam_pdf
+
+
+# ------------------------
+# 캐시 키
+# ------------------------
+def test_get_pdf_key_depends_on_content():
+    key = get_pdf_key(["a", "b"], {1: 2}, "화이팅")
+
+    assert key == get_pdf_key(("a", "b"), {1: 2}, "화이팅")
+    assert key != get_pdf_key(["b", "a"], {1: 2}, "화이팅")
+    assert key != get_pdf_key(["a", "b"], {1: 1, 2: 1}, "화이팅")
+    assert key != get_pdf_key(["a", "b"], {1: 2}, "다른 메시지")
+    assert key != get_pdf_key(["a", "b"], {1: 2}, None)
+    assert key != get_pdf_key(["a", "b"], {1: 2}, "화이팅", variants=(2, 1))
+
+
+def test_get_pdf_key_depends_on_layout(monkeypatch):
+    key = get_pdf_key(["a"], {1: 1}, "")
+    monkeypatch.setattr(exam_pdf, "PDF_LAYOUT_VERSION", exam_pdf.PDF_LAYOUT_VERSION + 1)
+
+    assert get_pdf_key(["a"], {1: 1}, "") != key
+
+
+# ------------------------
+# 렌더 캐시 (LRU, 바이트 예산)
+# ------------------------
+def test_cache_hit_and_miss(pdf_cache):
+    assert get_cached_pdf("a") is None
+    put_cached_pdf("a", b"x" * 10)
+
+    assert get_cached_pdf("a") == b"x" * 10
+    assert pdf_cache.get_pdf_cache_stats() == {"hits": 1, "misses": 1, "evictions": 0, "bytes": 10, "entries": 1}
+
+
+def test_cache_evicts_least_recently_used(pdf_cache):
+    put_cached_pdf("a", b"a" * 40)
+    put_cached_pdf("b", b"b" * 40)
+    get_cached_pdf("a")  # a를 최근 사용으로 옮긴다
+    put_cached_pdf("c", b"c" * 40)
+
+    assert get_cached_pdf("b") is None
+    assert get_cached_pdf("a") is not None
+    assert get_cached_pdf("c") is not None
+    stats = pdf_cache.get_pdf_cache_stats()
+    assert stats["bytes"] == 80
+    assert stats["evictions"] == 1
+
+
+def test_cache_counts_body_tuples_and_skips_oversized(pdf_cache):
+    put_cached_pdf("body", (b"x" * 30, (1, 2)))
+    put_cached_pdf("big", b"x" * 101)
+
+    assert get_cached_pdf("big") is None
+    assert pdf_cache.get_pdf_cache_stats()["bytes"] == 30
+
+
+# ------------------------
+# 묶음 임시 파일 정리
+# ------------------------
+def test_sweep_pack_files(tmp_path):
+    old = time.time() - exam_pdf.PACK_FILE_TTL_SEC - 10
+    for name in ["voca_pack_a.zip", "voca_roster_b.pdf.tmp", "voca_pack_new.pdf", "other.pdf"]:
+        (tmp_path / name).write_bytes(b"")
+    for name in ["voca_pack_a.zip", "voca_roster_b.pdf.tmp", "other.pdf"]:
+        os.utime(tmp_path / name, (old, old))
+
+    assert sweep_pack_files(directory=str(tmp_path)) == 2
+    assert sorted(os.listdir(tmp_path)) == ["other.pdf", "voca_pack_new.pdf"]
+
+
+def test_write_roster_pdf_rejects_empty_roster(tmp_path):
+    with pytest.raises(ValueError):
+        exam_pdf.write_roster_pdf([], [], str(tmp_path / "roster.pdf"), "")
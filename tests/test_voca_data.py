@@ -0,0 +1,165 @@
+from io import StringIO
+
+import pandas as pd
+import pytest
+from gspread.exceptions import APIError
+
+import voca_data
+from voca_data import (
+    WORDS_PER_DAY_OPTIONS,
+    build_day_markers,
+    build_vocab_index,
+    compact_frame,
+    get_review_days,
+    group_roster,
+    make_column_frame,
+    patch_vocab_index,
+    read_roster,
+)
+
+
+def make_sheet(n_rows):
+    return pd.DataFrame(
+        {
+            "표제어": [f"word{i}" for i in range(n_rows)],
+            "파생어": ["(a, /b)" if i % 3 == 0 else "" for i in range(n_rows)],
+            "쓰기": ["w" if i % 5 == 0 else "" for i in range(n_rows)],
+        }
+    )
+
+
+# ------------------------
+# 단어 인덱스
+# ------------------------
+def test_build_vocab_index_rows():
+    df = pd.DataFrame({"표제어": ["apple", "", "cat"], "파생어": ["(x, /y)", "z", None], "쓰기": ["", "", "c"]})
+    index = build_vocab_index(df)
+
+    assert index["words"] == ["apple", "x", "y", "z", "cat", "c"]
+    assert index["row_offsets"] == [0, 3, 4, 6]
+    assert index["n_rows"] == 3
+
+
+def test_build_vocab_index_day_offsets():
+    index = build_vocab_index(make_sheet(45))
+
+    for word_per_day in WORDS_PER_DAY_OPTIONS:
+        offsets = index["day_offsets"][word_per_day]
+        # 마지막 Day가 모자라도 시트 끝까지 구간에 들어간다
+        assert offsets[0] == 0
+        assert offsets[-1] == len(index["words"])
+        assert len(offsets) - 1 == -(-45 // word_per_day)
+
+
+def test_patch_vocab_index_matches_full_build():
+    df = make_sheet(50)
+    index = build_vocab_index(df.iloc[:32])
+    patched = patch_vocab_index(index, df, 32)
+    full = build_vocab_index(df)
+
+    assert patched["words"] == full["words"]
+    assert patched["row_offsets"] == full["row_offsets"]
+    assert patched["day_offsets"] == full["day_offsets"]
+
+
+def test_compact_frame_keeps_words():
+    df = make_sheet(60)
+    df.loc[1, "표제어"] = None
+    df.loc[2, "쓰기"] = "   "
+
+    assert build_vocab_index(compact_frame(df))["words"] == build_vocab_index(df)["words"]
+
+
+# ------------------------
+# Day 표시 / 복습 일정
+# ------------------------
+def test_build_day_markers():
+    notes = ["day1", "", "", "Day 2", "day2", "", "day3 복습", ""]
+    markers = build_day_markers(pd.DataFrame({"참고 사항": notes}))
+
+    # "Day 2"는 형식이 달라 무시되고, 같은 Day가 다시 나오면 처음 구간을 쓴다
+    assert markers == {1: (0, 4), 2: (4, 6), 3: (6, 8)}
+
+
+def test_build_day_markers_without_column():
+    assert build_day_markers(pd.DataFrame({"표제어": ["a"]})) == {}
+
+
+def test_get_review_days():
+    assert get_review_days(1) == (1,)
+    assert get_review_days(8) == (8, 7, 5, 1)
+    # 미리 만든 일정표를 넘어가도 같은 규칙으로 계산한다
+    day = voca_data.REVIEW_SCHEDULE_DAYS + 10
+    assert get_review_days(day) == tuple(day - i for i in voca_data.REVIEW_OFFSETS)
+
+
+# ------------------------
+# 반 명단
+# ------------------------
+def test_read_roster_and_group():
+    roster = read_roster(
+        StringIO("Name, Day, words_per_day\n홍길동,3,30\n김철수,3,\n이영희,5,30\n"),
+        default_words_per_day=30,
+    )
+
+    assert roster[1] == {"name": "김철수", "day": 3, "words_per_day": 30}
+    assert group_roster(roster) == {(3, 30): [0, 1], (5, 30): [2]}
+    assert group_roster(roster, keys=("day",)) == {(3,): [0, 1], (5,): [2]}
+
+
+@pytest.mark.parametrize(
+    "csv, kwargs, message",
+    [
+        ("name\n홍길동\n", {"default_words_per_day": 20}, "day 열이 없습니다"),
+        ("name,day\n홍길동,3\n", {}, "words_per_day 열이 없습니다"),
+        ("name,day\n", {"default_words_per_day": 20}, "학생이 없습니다"),
+        ("name,day,words_per_day\n홍길동,3,\n", {}, "비어 있습니다"),
+        ("name,day,words_per_day\n홍길동,3,25\n", {}, "중 하나여야"),
+        ("name,day\n홍길동,x\n", {"keys": ("day",)}, "숫자가 아닙니다"),
+        ("name,day\n,3\n", {"keys": ("day",)}, "올바르지 않습니다"),
+    ],
+)
+def test_read_roster_errors(csv, kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        read_roster(StringIO(csv), **kwargs)
+
+
+def test_read_roster_ignores_words_per_day_for_day_keys():
+    roster = read_roster(StringIO("name,day,words_per_day\n홍길동,3,25\n"), keys=("day",))
+
+    assert roster == [{"name": "홍길동", "day": 3}]
+
+
+# ------------------------
+# 시트 가져오기
+# ------------------------
+def test_make_column_frame_pads_short_columns():
+    df = make_column_frame(["표제어", "파생어", "쓰기"], [["a", "b", "c"], ["x"], []])
+
+    assert df["파생어"].tolist() == ["x", "", ""]
+    assert df["쓰기"].tolist() == ["", "", ""]
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.text = ""
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": "", "status": ""}}
+
+
+def test_get_retry_delay():
+    get_retry_delay = voca_data._get_retry_delay
+
+    assert get_retry_delay(ValueError(), 0) is None
+    assert get_retry_delay(APIError(FakeResponse(403)), 0) is None
+    assert get_retry_delay(APIError(FakeResponse(429, {"Retry-After": "7"})), 0) == 7
+    assert get_retry_delay(APIError(FakeResponse(503, {"Retry-After": "999"})), 0) == voca_data.BACKOFF_MAX_SEC
+
+    # 지수 백오프에 최대 절반의 지터를 더한다
+    delay = get_retry_delay(APIError(FakeResponse(500)), 2)
+    base = voca_data.BACKOFF_BASE_SEC * 4
+    assert base <= delay <= base * 1.5
+    assert get_retry_delay(APIError(FakeResponse(500)), 20) <= voca_data.BACKOFF_MAX_SEC * 1.5
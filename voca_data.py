@@ -0,0 +1,876 @@
+import json
+import logging
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+import pandas as pd
+from gspread.exceptions import APIError
+from gspread.urls import DRIVE_FILES_API_V3_URL
+from gspread.utils import absolute_range_name, fill_gaps
+
+from voca_events import timed
+
+# ------------------------
+# 로컬 스냅샷 저장소
+# ------------------------
+# 시트를 성공적으로 불러올 때마다 Parquet 파일로 저장해 두고,
+# 시트의 수정 시각이 바뀌지 않았으면 시트 대신 스냅샷을 읽는다.
+# Cloud Run의 로컬 파일 시스템은 인스턴스마다 따로이고 메모리에 있으므로, 실행 중에 쓴 스냅샷은
+# 다음 인스턴스가 보지 못한다. 이미지 빌드 때 prepare_snapshot.py로 구워 넣거나,
+# VOCA_SNAPSHOT_DIR을 공유 저장소(예: 마운트한 Cloud Storage 볼륨)로 지정한다.
+SNAPSHOT_DIR = os.environ.get("VOCA_SNAPSHOT_DIR", "./snapshot")
+
+
+def get_snapshot_paths(name):
+    data_path = os.path.join(SNAPSHOT_DIR, f"{name}.parquet")
+    meta_path = os.path.join(SNAPSHOT_DIR, f"{name}.meta.json")
+    return data_path, meta_path
+
+
+def read_snapshot_meta(name):
+    """스냅샷 메타데이터(dict)만 읽어서 반환 (없으면 None)"""
+    _, meta_path = get_snapshot_paths(name)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_snapshot(name):
+    """저장된 스냅샷을 (df, meta)로 반환 (없거나 읽을 수 없으면 (None, None))"""
+    data_path, meta_path = get_snapshot_paths(name)
+    if not (os.path.exists(data_path) and os.path.exists(meta_path)):
+        return None, None
+
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        df = pd.read_parquet(data_path)
+    except Exception as e:
+        logging.warning(f"스냅샷을 읽지 못했습니다 ({name}): {e}")
+        return None, None
+
+    return df, meta
+
+
+def write_snapshot(name, df, meta):
+    """df와 meta를 임시 파일에 쓴 뒤 교체하여 읽는 쪽이 깨진 파일을 보지 않도록 저장"""
+    data_path, meta_path = get_snapshot_paths(name)
+    # 공유 저장소에서는 여러 인스턴스가 함께 쓰므로 임시 파일 이름이 겹치지 않게 한다
+    suffix = f".{uuid.uuid4().hex}.tmp"
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        df.to_parquet(data_path + suffix, index=False)
+        with open(meta_path + suffix, "w", encoding="utf-8") as f:
+            json.dump({**meta, "saved_at": time.time()}, f, ensure_ascii=False)
+        os.replace(data_path + suffix, data_path)
+        os.replace(meta_path + suffix, meta_path)
+    except Exception as e:
+        # 스냅샷 저장 실패는 데이터 로드 자체를 실패시키지 않는다
+        logging.warning(f"스냅샷을 저장하지 못했습니다 ({name}): {e}")
+        for tmp_path in (data_path + suffix, meta_path + suffix):
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+# ------------------------
+# Google Sheets 도우미
+# ------------------------
+class MissingCredentialsError(Exception):
+    """서비스 계정 키 환경 변수가 없을 때"""
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(name, authorize):
+    """
+    authorize()로 만든 gspread 클라이언트와 찾아 둔 스프레드시트 ID/시트 이름을
+    프로세스 전체에서 재사용 (액세스 토큰은 만료되면 google-auth가 자동으로 갱신)
+    """
+    with _clients_lock:
+        if name not in _clients:
+            _clients[name] = {
+                "gc": authorize(),
+                "spreadsheet_id": None,
+                "sheet_title": None,
+                # {열 이름: 열 문자} (헤더 행에서 한 번만 찾는다)
+                "column_letters": None,
+            }
+        return _clients[name]
+
+
+def get_modified_time(gc, spreadsheet_id):
+    """Drive API로 스프레드시트의 마지막 수정 시각(RFC 3339 문자열)을 조회"""
+    response = gc.http_client.request(
+        "get",
+        f"{DRIVE_FILES_API_V3_URL}/{spreadsheet_id}",
+        params={"fields": "modifiedTime", "supportsAllDrives": True},
+    )
+    return response.json()["modifiedTime"]
+
+
+def get_column_letter(col):
+    """1부터 시작하는 열 번호를 A1 표기법의 열 문자로 변환 (1 -> A, 27 -> AA)"""
+    letters = ""
+    while col > 0:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def resolve_column_letters(client, columns):
+    """헤더 행만 읽어 필요한 열 이름의 위치를 찾는다 (시트에 없는 열은 제외)"""
+    gc = client["gc"]
+    title = client["sheet_title"]
+    response = gc.http_client.values_get(
+        client["spreadsheet_id"], absolute_range_name(title, "1:1")
+    )
+    header = (response.get("values") or [[]])[0]
+
+    column_letters = {}
+    for name in columns:
+        if name in header:
+            column_letters[name] = get_column_letter(header.index(name) + 1)
+        else:
+            logging.warning(f"시트 '{title}'에 '{name}' 열이 없습니다.")
+    return column_letters
+
+
+def fetch_columns(client, columns):
+    """
+    필요한 열만 한 번의 batchGet 요청으로 가져와 DataFrame으로 반환
+    각 범위는 헤더 셀을 포함하므로 열 위치가 바뀌었으면 다시 찾아서 한 번 더 요청한다
+    """
+    gc = client["gc"]
+    title = client["sheet_title"]
+
+    for attempt in range(2):
+        if client["column_letters"] is None or attempt > 0:
+            client["column_letters"] = resolve_column_letters(client, columns)
+        column_letters = client["column_letters"]
+        names = list(column_letters)
+        if not column_letters:
+            raise KeyError(f"시트 '{title}'에서 {columns} 열을 찾을 수 없습니다.")
+
+        response = gc.http_client.values_batch_get(
+            client["spreadsheet_id"],
+            [
+                absolute_range_name(title, f"{letter}:{letter}")
+                for letter in column_letters.values()
+            ],
+            params={"majorDimension": "COLUMNS"},
+        )
+        values = [
+            (value_range.get("values") or [[]])[0]
+            for value_range in response.get("valueRanges", [])
+        ]
+        headers = [column[0] if column else "" for column in values]
+        if headers == names:
+            break
+
+    return make_column_frame(headers, [column[1:] for column in values])
+
+
+def make_column_frame(names, columns):
+    """열별 값 목록으로 DataFrame을 만든다 (끝쪽의 빈 셀은 응답에서 빠지므로 가장 긴 열에 맞춰 채운다)"""
+    n_rows = max((len(column) for column in columns), default=0)
+    return pd.DataFrame(
+        {
+            name: column + [""] * (n_rows - len(column))
+            for name, column in zip(names, columns)
+        }
+    )
+
+
+def fetch_appended_rows(client, start_row):
+    """
+    이미 가진 start_row개 행 뒤에 추가된 행만 가져와 DataFrame으로 반환
+    헤더를 읽지 않으므로 fetch_columns()가 찾아 둔 열 위치를 그대로 쓴다
+    """
+    gc = client["gc"]
+    title = client["sheet_title"]
+    column_letters = client["column_letters"]
+    first = start_row + 2  # 1행은 헤더
+
+    response = gc.http_client.values_batch_get(
+        client["spreadsheet_id"],
+        [
+            absolute_range_name(title, f"{letter}{first}:{letter}")
+            for letter in column_letters.values()
+        ],
+        params={"majorDimension": "COLUMNS"},
+    )
+    values = [
+        (value_range.get("values") or [[]])[0]
+        for value_range in response.get("valueRanges", [])
+    ]
+    return make_column_frame(list(column_letters), values)
+
+
+def load_sheet_with_snapshot(client, name, version=None, columns=None, base=None):
+    """
+    시트가 수정되었을 때만 새로 읽어 (df, 수정 시각, 추가 시작 행)으로 반환
+    client: get_client()로 얻은 클라이언트 캐시
+    name: 스프레드시트 이름 (스냅샷 파일 이름으로도 사용)
+    version: 호출하는 쪽이 이미 가진 데이터의 수정 시각 (같으면 (None, version, None) 반환)
+    columns: 가져올 열 이름 목록 (None이면 시트 전체)
+    base: 호출하는 쪽이 가진 df, 주면 그 행 수 뒤에 추가된 행만 읽어 base 뒤에 붙인다
+          (추가 시작 행은 이때만 len(base), 전체를 읽었으면 None)
+    """
+    gc = client["gc"]
+    meta = read_snapshot_meta(name) or {}
+
+    # 이전에 찾은 스프레드시트 ID가 있으면 이름 검색(Drive API)을 건너뛴다
+    if not client["spreadsheet_id"]:
+        if meta.get("spreadsheet_id"):
+            client["spreadsheet_id"] = meta["spreadsheet_id"]
+        else:
+            spreadsheet = gc.open(name)
+            client["spreadsheet_id"] = spreadsheet.id
+            client["sheet_title"] = spreadsheet.sheet1.title
+    spreadsheet_id = client["spreadsheet_id"]
+
+    modified_time = get_modified_time(gc, spreadsheet_id)
+    if modified_time == version:
+        return None, version, None
+    if meta.get("modified_time") == modified_time and meta.get("columns") == columns:
+        snapshot_df, _ = read_snapshot(name)
+        if snapshot_df is not None:
+            return snapshot_df, modified_time, None
+
+    if base is not None and columns and client["column_letters"] and client["sheet_title"]:
+        appended = fetch_appended_rows(client, len(base))
+        # 추가된 행이 없는데 수정 시각이 바뀌었으면 기존 행이 고쳐진 것이므로 전체를 읽는다
+        if len(appended):
+            df = pd.concat([base.astype(object), appended], ignore_index=True)
+            write_snapshot(
+                name,
+                df,
+                {
+                    "spreadsheet_id": spreadsheet_id,
+                    "modified_time": modified_time,
+                    "columns": columns,
+                    "verified_at": meta.get("verified_at", 0.0),
+                },
+            )
+            return df, modified_time, len(base)
+
+    if not client["sheet_title"]:
+        client["sheet_title"] = gc.open_by_key(spreadsheet_id).sheet1.title
+    if columns:
+        df = fetch_columns(client, columns)
+    else:
+        # 시트 이름만으로 된 범위는 시트 전체를 의미 (get_all_values와 같은 결과)
+        response = gc.http_client.values_get(
+            spreadsheet_id, absolute_range_name(client["sheet_title"])
+        )
+        rows = fill_gaps(response.get("values", []))
+        df = pd.DataFrame(rows[1:], columns=rows[0])
+
+    write_snapshot(
+        name,
+        df,
+        {
+            "spreadsheet_id": spreadsheet_id,
+            "modified_time": modified_time,
+            "columns": columns,
+            "verified_at": time.time(),
+        },
+    )
+    return df, modified_time, None
+
+
+# ------------------------
+# 단어 인덱스 생성 함수
+# ------------------------
+# 앱에서 선택할 수 있는 하루 단어 수 (라디오 버튼과 동일)
+WORDS_PER_DAY_OPTIONS = [15, 20, 30]
+
+
+def get_row_words(headword, derivative, writing):
+    """한 행(표제어)에서 시험에 출제할 단어 목록을 반환"""
+    words = []
+
+    # 표제어
+    if headword and str(headword).strip():
+        words.append(str(headword))
+
+    # 파생어 (쉼표로 구분된 경우)
+    if derivative and str(derivative).strip():
+        derivatives = [
+            w.strip() for w in str(derivative).strip("()").split(",") if w.strip()
+        ]
+
+        for w in derivatives:
+            if w.startswith("/"):
+                words.append(w.lstrip("/ "))
+            else:
+                words.append(w)
+
+    # 쓰기
+    if writing and str(writing).strip():
+        words.append(str(writing))
+
+    return words
+
+
+def get_day_offsets(row_offsets, word_per_day):
+    """Day d의 단어 구간이 offsets[d - 1] ~ offsets[d] 가 되도록 행 오프셋을 잘라낸다"""
+    offsets = row_offsets[::word_per_day]
+    if (len(row_offsets) - 1) % word_per_day:
+        offsets.append(row_offsets[-1])
+    return offsets
+
+
+def build_vocab_index(df):
+    """
+    시트 로드 후 한 번만 만드는 평탄화된 단어 인덱스
+    words: 모든 표제어/파생어/쓰기를 행 순서대로 이어 붙인 리스트
+    row_offsets: row_offsets[r] ~ row_offsets[r + 1] 이 r번째 행의 단어 구간
+    day_offsets: {word_per_day: [Day1 시작, Day2 시작, ..., 마지막 끝]}
+    """
+    words = []
+    row_offsets = [0]
+    append_rows(words, row_offsets, df)
+    return make_vocab_index(words, row_offsets)
+
+
+def iter_row_words(df):
+    """df의 각 행에서 출제할 단어 목록을 행 순서대로 반환"""
+    columns = [
+        df[name].tolist() if name in df.columns else [None] * len(df)
+        for name in ("표제어", "파생어", "쓰기")
+    ]
+    for headword, derivative, writing in zip(*columns):
+        yield get_row_words(headword, derivative, writing)
+
+
+def append_rows(words, row_offsets, df):
+    """df의 행에서 단어를 뽑아 words/row_offsets 뒤에 이어 붙인다"""
+    new_words = []
+    new_offsets = []
+    for row_words in iter_row_words(df):
+        new_words.extend(row_words)
+        new_offsets.append(row_offsets[-1] + len(new_words))
+    # 다 만든 뒤 한 번에 붙여, 중간에 실패해도 기존 리스트는 그대로 둔다
+    words.extend(new_words)
+    row_offsets.extend(new_offsets)
+
+
+def patch_vocab_index(index, df, start):
+    """
+    증분 동기화용: start행부터 추가된 행만 파싱해 기존 인덱스의 words/row_offsets 뒤에 붙인다
+    리스트는 늘어나기만 하므로 이전 인덱스(dict)를 들고 있는 요청도 그대로 쓸 수 있다
+    """
+    words, row_offsets = index["words"], index["row_offsets"]
+    append_rows(words, row_offsets, df.iloc[start:])
+    return make_vocab_index(words, row_offsets)
+
+
+def make_vocab_index(words, row_offsets):
+    n_rows = len(row_offsets) - 1
+    day_offsets = {
+        word_per_day: get_day_offsets(row_offsets, word_per_day)
+        for word_per_day in WORDS_PER_DAY_OPTIONS
+    }
+
+    return {
+        "words": words,
+        "row_offsets": row_offsets,
+        "day_offsets": day_offsets,
+        "n_rows": n_rows,
+    }
+
+
+# ------------------------
+# Day 구간 인덱스 생성 함수
+# ------------------------
+DAY_MARKER_PATTERN = re.compile(r"day(\d+)")
+
+
+def build_day_markers(df):
+    """
+    "참고 사항" 열의 dayN 표시를 한 번만 읽어 {N: (시작 행, 끝 행)} 으로 반환
+    다음 dayN 표시가 나오기 전까지가 해당 Day의 구간 (마지막 Day는 시트 끝까지)
+    """
+    if "참고 사항" not in df.columns:
+        return {}
+
+    starts = []
+    for row_idx, note in enumerate(df["참고 사항"].tolist()):
+        match = DAY_MARKER_PATTERN.search(str(note)) if note else None
+        if match:
+            starts.append((row_idx, int(match.group(1))))
+
+    day_markers = {}
+    ends = [row_idx for row_idx, _ in starts[1:]] + [len(df)]
+    for (start_idx, d), end_idx in zip(starts, ends):
+        # 같은 Day 표시가 여러 번 있으면 처음 나온 구간을 사용
+        day_markers.setdefault(d, (start_idx, end_idx))
+
+    return day_markers
+
+
+# ------------------------
+# 복습 일정표
+# ------------------------
+# 시험 Day에 함께 출제하는 복습 Day (1, 3, 7, 14, 30, 60, 120일 전)
+REVIEW_OFFSETS = [0, 1, 3, 7, 14, 30, 60, 120]
+# 미리 만들어 두는 일정표의 마지막 Day (넘어가면 그때 계산)
+REVIEW_SCHEDULE_DAYS = int(os.environ.get("VOCA_REVIEW_SCHEDULE_DAYS", 400))
+
+
+def build_review_schedule(max_day):
+    """schedule[day] = day 시험지에 나오는 Day 튜플 (0번은 비워 둔다)"""
+    return [()] + [
+        tuple(day - i for i in REVIEW_OFFSETS if day - i > 0)
+        for day in range(1, max_day + 1)
+    ]
+
+
+REVIEW_SCHEDULE = build_review_schedule(REVIEW_SCHEDULE_DAYS)
+
+
+def get_review_days(day):
+    if 0 < day < len(REVIEW_SCHEDULE):
+        return REVIEW_SCHEDULE[day]
+    return tuple(day - i for i in REVIEW_OFFSETS if day - i > 0)
+
+
+# ------------------------
+# 반 명단
+# ------------------------
+# 학원에서 학생마다 진도가 다르므로 CSV(name, day, words_per_day)로 받아 한 번에 만든다
+ROSTER_COLUMNS = ["name", "day", "words_per_day"]
+
+
+def read_roster(file, default_words_per_day=None, keys=("day", "words_per_day")):
+    """
+    CSV 명단을 [{"name", "day", "words_per_day"}]로 읽는다 (words_per_day 열은 생략 가능)
+    keys: group_roster에 넘길 키, words_per_day가 없으면 그 열은 읽지도 검사하지도 않는다
+    형식이 맞지 않거나 학생이 없으면 ValueError
+    """
+    roster_df = pd.read_csv(file, dtype=str, skipinitialspace=True).fillna("")
+    roster_df.columns = [str(col).strip().lower() for col in roster_df.columns]
+    use_words_per_day = "words_per_day" in keys
+    required = ROSTER_COLUMNS[:2]
+    if use_words_per_day and default_words_per_day is None:
+        required = ROSTER_COLUMNS
+    missing = [col for col in required if col not in roster_df.columns]
+    if missing:
+        raise ValueError(f"명단에 {', '.join(missing)} 열이 없습니다.")
+    if roster_df.empty:
+        raise ValueError("명단에 학생이 없습니다.")
+
+    roster = []
+    for line_no, row in enumerate(roster_df.itertuples(index=False), start=2):
+        row = row._asdict()
+        name = row["name"].strip()
+        try:
+            day = int(row["day"])
+        except ValueError:
+            raise ValueError(f"{line_no}번째 줄의 day가 숫자가 아닙니다.")
+        if not name or day <= 0:
+            raise ValueError(f"{line_no}번째 줄의 이름이나 Day가 올바르지 않습니다.")
+        student = {"name": name, "day": day}
+        if use_words_per_day:
+            value = row.get("words_per_day", "").strip()
+            if not value and default_words_per_day is None:
+                raise ValueError(f"{line_no}번째 줄의 words_per_day가 비어 있습니다.")
+            try:
+                words_per_day = int(value) if value else default_words_per_day
+            except ValueError:
+                raise ValueError(f"{line_no}번째 줄의 words_per_day가 숫자가 아닙니다.")
+            if words_per_day not in WORDS_PER_DAY_OPTIONS:
+                raise ValueError(
+                    f"{line_no}번째 줄의 words_per_day는 {WORDS_PER_DAY_OPTIONS} 중 하나여야 합니다."
+                )
+            student["words_per_day"] = words_per_day
+        roster.append(student)
+    return roster
+
+
+def group_roster(roster, keys=("day", "words_per_day")):
+    """같은 시험지를 받는 학생끼리 묶어 {(day, words_per_day): [명단 순번]}으로 반환"""
+    groups = {}
+    for position, student in enumerate(roster):
+        groups.setdefault(tuple(student[key] for key in keys), []).append(position)
+    return groups
+
+
+# ------------------------
+# 데이터 캐시 (stale-while-revalidate)
+# ------------------------
+# 마지막으로 성공한 DataFrame을 항상 즉시 돌려주고,
+# TTL이 지나면 백그라운드 스레드에서 새로 가져와 교체한다.
+DATA_TTL_SEC = float(os.environ.get("VOCA_DATA_TTL_SEC", 600))
+# 갱신이 실패하면 이 시간 뒤에 다시 시도 (실패할 때마다 시트를 두드리지 않도록)
+ERROR_RETRY_SEC = float(os.environ.get("VOCA_ERROR_RETRY_SEC", 60))
+# 보여줄 데이터가 하나도 없을 때 요청 경로에서 기다리는 최대 시간
+FETCH_TIMEOUT_SEC = float(os.environ.get("VOCA_FETCH_TIMEOUT_SEC", 20))
+# 할당량 초과(429)나 일시적 서버 오류(5xx) 시 지수 백오프 재시도
+FETCH_MAX_RETRIES = int(os.environ.get("VOCA_FETCH_MAX_RETRIES", 4))
+BACKOFF_BASE_SEC = 1.0
+BACKOFF_MAX_SEC = 32.0
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# append: 수정 시각이 바뀌면 가진 행 수 뒤에 추가된 행만 읽어 붙이고 파생 데이터도 그 행만 반영
+#         (추가된 행이 없으면 기존 행이 고쳐진 것이므로 전체를 읽는다)
+# full: 매번 전체를 읽는다
+SYNC_MODE = os.environ.get("VOCA_SYNC_MODE", "append")
+# 추가와 수정이 함께 일어나면 추가분만 반영되므로, 이 간격마다 한 번은 전체를 읽어 확인한다
+SYNC_VERIFY_SEC = float(os.environ.get("VOCA_SYNC_VERIFY_SEC", 3600))
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(name):
+    """프로세스 전체에서 공유하는 데이터 캐시 (모듈은 재실행되지 않으므로 유지된다)"""
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = {
+                "df": None,
+                "derived": None,
+                "version": None,
+                "verified_at": 0.0,  # 마지막으로 시트 전체와 맞춘 시각
+                "fetched_at": None,
+                "refresh_after": 0.0,
+                "last_error": None,
+                "thread": None,
+                "lock": threading.Lock(),
+                # 관측용 카운터
+                "stats": {
+                    "fetches": 0,  # 실제로 시작된 시트 조회 수
+                    "coalesced_waits": 0,  # 진행 중인 조회를 기다린 요청 수
+                    "retries": 0,  # 백오프 후 재시도 수
+                    "quota_errors": 0,  # 429 응답 수
+                    "failures": 0,  # 재시도 후에도 실패한 조회 수
+                    "full_syncs": 0,  # 시트 전체를 반영한 수
+                    "appended_rows": 0,  # 증분 동기화로 추가한 행 수
+                    "df_bytes": 0,  # 현재 DataFrame의 메모리 사용량
+                },
+            }
+        return _stores[name]
+
+
+# ------------------------
+# 메모리 절약형 DataFrame
+# ------------------------
+# 고유값 비율이 이보다 낮은 열(예: 대부분 비어 있는 "참고 사항")은 category로 저장
+# 시트 모양의 3000행 4열 프레임에서 717KB -> 123KB. 파생어처럼 고유값이 40% 정도인 열은
+# category(코드 + 고유값)보다 Arrow 문자열(빈 셀은 오프셋 4바이트)이 더 작아 기준을 낮게 둔다
+CATEGORY_RATIO = 0.2
+
+
+def compact_frame(df):
+    """
+    빈 셀(None/NaN/공백뿐인 셀)을 ""로 한 번만 정리하고,
+    object 열을 Arrow 문자열 또는 category(고유값도 Arrow 문자열)로 바꿔 인스턴스당 메모리를 줄인다
+    """
+    columns = []
+    for _, col in df.items():
+        values = col.astype(object).where(col.notna(), "").astype(str)
+        values = values.where(values.str.strip() != "", "")
+        if len(values) and values.nunique() / len(values) < CATEGORY_RATIO:
+            categories = pd.Index(values.unique(), dtype="string[pyarrow]")
+            columns.append(values.astype(pd.CategoricalDtype(categories)))
+        else:
+            columns.append(values.astype("string[pyarrow]"))
+
+    if not columns:
+        return df
+    compact = pd.concat(columns, axis=1)
+    compact.index = pd.RangeIndex(len(compact))
+    return compact
+
+
+def get_frame_bytes(df):
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def _publish(store, df, version, derive, patch=None, start=None):
+    """
+    파생 데이터까지 만든 뒤 한 번에 교체하여 df와 인덱스가 어긋나지 않도록 한다
+    df가 None이면 데이터가 바뀌지 않은 것이므로 갱신 시각만 미룬다
+    start: df의 start행부터가 새로 추가된 행이면 patch(old_derived, df, start)로 그 행만 반영
+    """
+    if df is not None:
+        raw_bytes = get_frame_bytes(df)
+        df = compact_frame(df)
+        logging.info(
+            f"DataFrame 메모리: {raw_bytes / 1024:.0f}KB -> "
+            f"{get_frame_bytes(df) / 1024:.0f}KB ({len(df)}행, {len(df.columns)}열)"
+        )
+        with store["lock"]:
+            old_derived = store["derived"]
+        if start is not None and patch and old_derived is not None:
+            derived = patch(old_derived, df, start)
+            _count(store, "appended_rows", len(df) - start)
+        else:
+            derived = derive(df) if derive else None
+        if start is None:
+            _count(store, "full_syncs")
+
+    with store["lock"]:
+        if df is not None:
+            store["df"], store["derived"] = df, derived
+            store["version"] = version
+            if start is None:
+                store["verified_at"] = time.time()
+            store["stats"]["df_bytes"] = get_frame_bytes(df)
+        store["fetched_at"] = time.time()
+        store["refresh_after"] = time.time() + DATA_TTL_SEC
+        store["last_error"] = None
+
+
+def _current(store):
+    with store["lock"]:
+        return store["df"], store["derived"]
+
+
+def _count(store, key, n=1):
+    with store["lock"]:
+        store["stats"][key] += n
+
+
+def get_store_names():
+    with _stores_lock:
+        return list(_stores)
+
+
+def get_stats(name):
+    """조회/대기/재시도 카운터의 사본을 반환"""
+    store = get_store(name)
+    with store["lock"]:
+        return dict(store["stats"])
+
+
+def _get_retry_delay(e, attempt):
+    """재시도할 오류면 기다릴 초를, 아니면 None을 반환"""
+    if not isinstance(e, APIError):
+        return None
+    status = e.response.status_code
+    if status not in RETRYABLE_STATUS:
+        return None
+
+    # 서버가 Retry-After를 알려주면 그 값을 우선한다
+    retry_after = e.response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return min(float(retry_after), BACKOFF_MAX_SEC)
+    delay = min(BACKOFF_BASE_SEC * 2**attempt, BACKOFF_MAX_SEC)
+    return delay + random.uniform(0, delay / 2)
+
+
+def _get_sync_base(store):
+    """추가된 행만 읽을 기준 df를 반환 (전체를 읽어 확인할 때가 되었으면 None)"""
+    with store["lock"]:
+        if SYNC_MODE != "append" or time.time() - store["verified_at"] >= SYNC_VERIFY_SEC:
+            return None
+        return store["df"]
+
+
+def _fetch_with_backoff(name, store, fetch):
+    base = _get_sync_base(store)
+    attempt = 0
+    while True:
+        try:
+            return fetch(store["version"], base)
+        except Exception as e:
+            if isinstance(e, APIError) and e.response.status_code == 429:
+                _count(store, "quota_errors")
+            delay = _get_retry_delay(e, attempt)
+            if delay is None or attempt >= FETCH_MAX_RETRIES:
+                raise
+            attempt += 1
+            _count(store, "retries")
+            logging.info(
+                f"시트 조회 재시도 ({name}): {attempt}/{FETCH_MAX_RETRIES}, "
+                f"{delay:.1f}초 대기 ({e})"
+            )
+            time.sleep(delay)
+
+
+def _refresh(name, store, fetch, derive, patch):
+    try:
+        # 실제 조회(재시도 포함)에 걸린 시간과 결과, 요청 경로의 load_data 단계와는 따로 남긴다
+        with timed(None, "data_fetch") as span:
+            span["store"] = name
+            span["outcome"] = "error"
+            df, version, start = _fetch_with_backoff(name, store, fetch)
+            span["outcome"] = "ok"
+            span["sync"] = "unchanged" if df is None else "full" if start is None else "append"
+        _publish(store, df, version, derive, patch, start)
+    except Exception as e:
+        _count(store, "failures")
+        logging.warning(f"데이터 갱신 실패 ({name}): {e}")
+        with store["lock"]:
+            store["last_error"] = e
+            store["refresh_after"] = time.time() + ERROR_RETRY_SEC
+    logging.info(f"데이터 조회 카운터 ({name}): {get_stats(name)}")
+
+
+def _start_refresh(name, store, fetch, derive, patch):
+    """
+    프로세스 전체에서 조회는 하나만 진행되도록 보장 (single-flight)
+    진행 중인 조회가 있으면 그 스레드를, 없으면 새로 시작한 스레드를 반환
+    """
+    with store["lock"]:
+        thread = store["thread"]
+        if thread is not None and thread.is_alive():
+            return thread, False
+
+        thread = threading.Thread(
+            target=_refresh,
+            args=(name, store, fetch, derive, patch),
+            name=f"voca-refresh-{name}",
+            daemon=True,
+        )
+        store["thread"] = thread
+        store["stats"]["fetches"] += 1
+        thread.start()
+        return thread, True
+
+
+def get_data(name, fetch, derive=None, patch=None, use_snapshot=True, columns=None):
+    """
+    캐시된 (df, derived)를 반환
+    name: 캐시 이름 (스냅샷 파일 이름과 같음)
+    fetch: fetch(version, base) -> (df, version, start), 가진 버전과 같으면 df 자리에 None
+           base(가진 df)를 받으면 추가된 행만 읽어 붙이고 start에 추가 시작 행을 줄 수 있다
+           (실패하면 예외를 던진다)
+    derive: df와 함께 보관할 파생 데이터(예: 단어 인덱스)를 만드는 함수
+    patch: patch(old_derived, df, start) -> derived, 추가된 행만 반영하는 함수
+    use_snapshot: 데이터가 없을 때 로컬 스냅샷을 먼저 보여줄지 여부
+    columns: fetch가 가져오는 열 이름 목록 (스냅샷의 열 구성이 다르면 쓰지 않는다)
+    """
+    store = get_store(name)
+
+    if store["df"] is None and use_snapshot:
+        # 프로세스가 막 시작된 경우: 스냅샷이 있으면 바로 쓰고 갱신은 뒤에서
+        snapshot_df, meta = read_snapshot(name)
+        # 같은 시트를 다른 열 구성으로 읽는 앱이 저장한 스냅샷이면 건너뛴다
+        # (수정 시각이 같아 갱신으로도 바로잡히지 않는다)
+        if snapshot_df is not None and meta.get("columns") == columns:
+            snapshot_df = compact_frame(snapshot_df)
+            with store["lock"]:
+                if store["df"] is None:
+                    store["df"] = snapshot_df
+                    store["derived"] = derive(snapshot_df) if derive else None
+                    store["version"] = meta.get("modified_time")
+                    store["verified_at"] = meta.get("verified_at", 0.0)
+                    store["stats"]["df_bytes"] = get_frame_bytes(snapshot_df)
+
+    df, derived = _current(store)
+    if df is not None:
+        if time.time() >= store["refresh_after"]:
+            _start_refresh(name, store, fetch, derive, patch)
+        return df, derived
+
+    # 방금 실패했다면 재시도 시각 전까지는 시트를 다시 부르지 않는다
+    with store["lock"]:
+        last_error = store["last_error"]
+        thread = store["thread"]
+        if (
+            last_error is not None
+            and time.time() < store["refresh_after"]
+            and not (thread is not None and thread.is_alive())
+        ):
+            raise last_error
+
+    # 보여줄 데이터가 전혀 없으면 진행 중인 조회 하나를 함께 기다린다 (제한 시간 안에서만)
+    thread, started = _start_refresh(name, store, fetch, derive, patch)
+    if not started:
+        _count(store, "coalesced_waits")
+    thread.join(FETCH_TIMEOUT_SEC)
+    df, derived = _current(store)
+    if df is not None:
+        return df, derived
+    if thread.is_alive() or store["last_error"] is None:
+        raise TimeoutError(f"{FETCH_TIMEOUT_SEC:.0f}초 안에 데이터를 불러오지 못했습니다.")
+    raise store["last_error"]
+
+
+# ------------------------
+# 데이터 소스 선택
+# ------------------------
+# VOCA_DATA_SOURCE=sheets(기본) | csv | parquet | sqlite
+# 로컬 파일 소스는 네트워크 없이 동작하므로 오프라인 벤치마크, 로컬 개발,
+# 이미지에 구워 넣은 스냅샷으로 서비스하는 경우에 사용한다.
+DATA_SOURCE = os.environ.get("VOCA_DATA_SOURCE", "sheets")
+# 로컬 파일 경로 (없으면 소스별 기본 경로)
+DATA_PATH = os.environ.get("VOCA_DATA_PATH")
+# sqlite 소스에서 읽을 테이블 이름
+DATA_TABLE = os.environ.get("VOCA_DATA_TABLE", "voca")
+
+
+def read_csv_source(path):
+    # 시트와 같이 모든 셀을 문자열로, 빈 셀은 ""로 읽는다
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def read_parquet_source(path):
+    return pd.read_parquet(path)
+
+
+def read_sqlite_source(path):
+    with sqlite3.connect(f"file:{path}?mode=ro", uri=True) as conn:
+        df = pd.read_sql_query(f'SELECT * FROM "{DATA_TABLE}"', conn)
+    return df.fillna("").astype(str)
+
+
+# {소스 이름: (파일 읽기 함수, 기본 경로 형식)}
+LOCAL_SOURCES = {
+    "csv": (read_csv_source, "./data/{name}.csv"),
+    "parquet": (read_parquet_source, os.path.join(SNAPSHOT_DIR, "{name}.parquet")),
+    "sqlite": (read_sqlite_source, "./data/{name}.db"),
+}
+
+
+def make_fetch(name, authorize, columns=None):
+    """
+    VOCA_DATA_SOURCE에 맞는 fetch(version, base) 함수를 만든다 (get_data()에 넘겨 사용)
+    name: 스프레드시트 이름 (로컬 소스에서는 기본 파일 이름)
+    authorize: gspread 클라이언트를 만드는 함수 (sheets 소스에서만 사용)
+    columns: 필요한 열 이름 목록 (None이면 전체)
+    """
+    if DATA_SOURCE == "sheets":
+
+        def fetch(version, base=None):
+            client = get_client(name, authorize)
+            # 시트가 수정되지 않았으면 로컬 스냅샷을 사용
+            return load_sheet_with_snapshot(client, name, version, columns, base)
+
+        return fetch
+
+    if DATA_SOURCE not in LOCAL_SOURCES:
+        raise ValueError(f"알 수 없는 VOCA_DATA_SOURCE입니다: {DATA_SOURCE}")
+    read_source, default_path = LOCAL_SOURCES[DATA_SOURCE]
+    path = DATA_PATH or default_path.format(name=name)
+
+    def fetch(version, base=None):
+        # 로컬 파일은 수정 시각(mtime)을 버전으로 사용하고 항상 전체를 읽는다
+        mtime = str(os.path.getmtime(path))
+        if mtime == version:
+            return None, version, None
+        df = read_source(path)
+        if columns:
+            df = df[[col for col in columns if col in df.columns]]
+        return df, mtime, None
+
+    return fetch
+
+
+def uses_snapshot():
+    """스냅샷은 Google Sheets 소스일 때만 의미가 있다"""
+    return DATA_SOURCE == "sheets"
@@ -0,0 +1,188 @@
+"""
+사용자 행동 로그와 단계별 소요 시간 기록
+
+Streamlit 앱(run.py 등)이 함께 쓴다.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# ------------------------
+# 단계별 소요 시간 (span)
+# ------------------------
+# load_data(), get_exam_words(), build_two_column_data(), make_pdf() 같은 단계를 timed()로 감싸
+# 걸린 시간과 단어 수, 페이지 수, 캐시 적중 여부를 모아 두었다가 사용자 행동 로그에 함께 남긴다.
+# VOCA_TRACE=0 이면 로그에 단계별 기록을 붙이지 않는다 (지표용으로 시간만 잰다).
+TRACE_ENABLED = os.environ.get("VOCA_TRACE", "1") == "1"
+
+# 단계가 끝날 때 / 이벤트가 들어올 때 부르는 함수 (voca_metrics가 등록한다)
+_listeners = {"stage": [], "event": []}
+
+
+def add_listener(kind, fn):
+    """kind="stage"면 fn(stage, fields), kind="event"면 fn(event_name, event_params)"""
+    _listeners[kind].append(fn)
+
+
+def _notify(kind, *args):
+    for fn in _listeners[kind]:
+        try:
+            fn(*args)
+        except Exception as e:
+            logging.warning(f"{kind} 리스너 오류: {e}")
+
+
+def new_trace():
+    """한 번의 실행(rerun)에서 단계별 기록을 모을 dict, 꺼져 있으면 None"""
+    return {} if TRACE_ENABLED else None
+
+
+@contextmanager
+def timed(trace, stage):
+    """
+    블록에 걸린 시간을 fields["ms"]에 기록하고 trace[stage]에 넣는다 (trace가 None이면 넣지 않는다)
+    블록 안에서는 yield된 fields에 단어 수 등 값을 붙인다
+    """
+    fields = {}
+    start = time.perf_counter()
+    try:
+        yield fields
+    finally:
+        fields["ms"] = round((time.perf_counter() - start) * 1000, 1)
+        if trace is not None:
+            trace[stage] = fields
+        if _listeners["stage"]:
+            _notify("stage", stage, fields)
+
+
+# -------------------------------------------------------------------
+# 사용자 행동을 GCP Cloud Logging에 기록하는 함수
+# -------------------------------------------------------------------
+# 클릭마다 스크립트 스레드에서 로그를 쓰지 않도록, 이벤트는 대기열에 넣기만 하고
+# 백그라운드 스레드가 모아서 한 줄에 하나씩 JSON으로 stdout에 쓴다.
+# (Cloud Run은 stdout의 JSON 줄을 구조화 로그로 수집한다)
+EVENT_QUEUE_SIZE = int(os.environ.get("VOCA_EVENT_QUEUE_SIZE", 10000))
+EVENT_BATCH_SIZE = int(os.environ.get("VOCA_EVENT_BATCH_SIZE", 100))
+EVENT_FLUSH_SEC = float(os.environ.get("VOCA_EVENT_FLUSH_SEC", 1.0))
+# 자주 일어나는 이벤트는 일부만 남긴다 ("이벤트=비율,이벤트=비율"), 남긴 이벤트에 sample_rate를 함께 기록
+EVENT_SAMPLE_RATES = {
+    name.strip(): float(rate)
+    for name, _, rate in (
+        item.partition("=")
+        for item in os.environ.get("VOCA_EVENT_SAMPLE_RATES", "exam_shuffled=0.25").split(",")
+        if item.strip()
+    )
+}
+
+_events = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+_event_writer = None
+_event_writer_lock = threading.Lock()
+_event_stats = {"queued": 0, "written": 0, "dropped": 0, "sampled_out": 0, "batches": 0}
+_event_stats_lock = threading.Lock()
+
+
+def get_event_stats():
+    with _event_stats_lock:
+        stats = dict(_event_stats)
+    return {**stats, "pending": _events.qsize()}
+
+
+def _count_event(key, n=1):
+    # 요청 스레드, 쓰기 스레드, 종료 시 flush_events가 함께 센다
+    with _event_stats_lock:
+        _event_stats[key] += n
+
+
+def _write_events(batch, stream=None):
+    stream = stream or sys.stdout
+    lines = [json.dumps(event, ensure_ascii=False, default=str) for event in batch]
+    stream.write("\n".join(lines) + "\n")
+    stream.flush()
+    with _event_stats_lock:
+        _event_stats["written"] += len(batch)
+        _event_stats["batches"] += 1
+
+
+def _run_event_writer():
+    while True:
+        batch = [_events.get()]
+        deadline = time.monotonic() + EVENT_FLUSH_SEC
+        while len(batch) < EVENT_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(_events.get(timeout=timeout))
+            except queue.Empty:
+                break
+        try:
+            _write_events(batch)
+        except Exception as e:
+            logging.warning(f"사용자 행동 로그를 쓰지 못했습니다: {e}")
+
+
+def _start_event_writer():
+    global _event_writer
+    with _event_writer_lock:
+        if _event_writer is None:
+            _event_writer = threading.Thread(
+                target=_run_event_writer, name="voca-events", daemon=True
+            )
+            _event_writer.start()
+            atexit.register(flush_events)
+
+
+def flush_events():
+    """대기열에 남은 이벤트를 지금 스레드에서 바로 쓴다 (프로세스 종료 때)"""
+    batch = []
+    while True:
+        try:
+            batch.append(_events.get_nowait())
+        except queue.Empty:
+            break
+    if batch:
+        _write_events(batch)
+
+
+def track_user_action(event_name: str, timings=None, **event_params):
+    """
+    사용자 행동을 JSON 한 줄로 GCP Cloud Logging에 남긴다 (대기열에 넣고 바로 반환)
+    timings: timed()로 모은 단계별 기록
+    """
+    # 지표는 표본 추출과 상관없이 모든 이벤트를 센다
+    if _listeners["event"]:
+        _notify("event", event_name, event_params)
+
+    sample_rate = EVENT_SAMPLE_RATES.get(event_name, 1.0)
+    if sample_rate < 1.0 and random.random() >= sample_rate:
+        _count_event("sampled_out")
+        return
+
+    log_data = {
+        "severity": "INFO",
+        "message": "USER_ACTION_TRACKING",
+        # 모아서 쓰므로 이벤트가 일어난 시각을 직접 기록한다
+        "time": datetime.now(timezone.utc).isoformat(),
+        "event": event_name,
+        "user_params": event_params,
+    }
+    if sample_rate < 1.0:
+        log_data["sample_rate"] = sample_rate
+    if timings:
+        # 스크립트가 이후 단계를 계속 기록하므로 지금 값을 복사해 둔다
+        log_data["timings"] = {stage: dict(fields) for stage, fields in timings.items()}
+
+    _start_event_writer()
+    try:
+        _events.put_nowait(log_data)
+        _count_event("queued")
+    except queue.Full:
+        _count_event("dropped")
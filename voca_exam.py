@@ -0,0 +1,273 @@
+"""
+시험지 생성 엔진 (Streamlit 없이 쓰는 부분)
+
+Streamlit 앱(run.py 등)과 작업 프로세스, 야간 미리 생성, 명령줄이 함께 쓴다.
+import할 때는 아무 일도 하지 않는다 (시트 접속과 폰트 등록은 처음 필요할 때 한다).
+
+사용법:
+    python voca_exam.py --day 50 --per-day 20 -o day50.pdf
+    python voca_exam.py --days 1-60 --per-day 20 -o day1-60.zip
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+
+import gspread
+from google.oauth2.service_account import Credentials
+
+from exam_pdf import PACK_FORMATS, build_two_column_data, make_pdf, write_exam_pack
+from voca_data import (
+    FETCH_TIMEOUT_SEC,
+    WORDS_PER_DAY_OPTIONS,
+    MissingCredentialsError,
+    build_vocab_index,
+    get_data,
+    get_day_offsets,
+    get_review_days,
+    iter_row_words,
+    make_fetch,
+    patch_vocab_index,
+    uses_snapshot,
+)
+
+# ------------------------
+# 인증
+# ------------------------
+# Sheets와 Drive API 접근에 필요한 권한 범위 정의
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.readonly",
+]
+
+
+def authorize_from_env():
+    """GOOGLE_APPLICATION_CREDENTIALS(키 JSON 내용)로 인증된 gspread 클라이언트를 만든다"""
+    # 서비스 계정 키의 JSON 내용 가져오기
+    secrets_json = os.environ.get("GOOGLE_APPLICATION_CREDENTIALS")
+    if not secrets_json:
+        raise MissingCredentialsError()
+
+    # JSON 내용으로 자격 증명(Credentials) 객체 생성 및 권한 범위 적용
+    credentials_info = json.loads(secrets_json)
+    credentials = Credentials.from_service_account_info(
+        credentials_info, scopes=SCOPES
+    )
+
+    # 권한이 적용된 자격 증명으로 gspread 인증
+    gc = gspread.authorize(credentials)
+    gc.http_client.set_timeout(FETCH_TIMEOUT_SEC)
+    return gc
+
+
+def authorize_from_file(key_file):
+    """서비스 계정 키 파일로 인증된 gspread 클라이언트를 만든다"""
+    gc = gspread.service_account(key_file)
+    gc.http_client.set_timeout(FETCH_TIMEOUT_SEC)
+    return gc
+
+
+# ------------------------
+# 데이터 불러오기
+# ------------------------
+# 시험지 생성에 필요한 열 (나머지 열은 내려받지 않는다)
+SHEET_COLUMNS = ["표제어", "파생어", "쓰기"]
+
+
+def load_vocab(name, authorize, columns=SHEET_COLUMNS, derive=build_vocab_index, patch=patch_vocab_index):
+    """
+    (df, 파생 데이터)를 반환 (기본은 build_vocab_index()의 단어 인덱스)
+    오류는 그대로 올리므로 화면에 보여주는 일은 부르는 쪽에서 한다
+    """
+    return get_data(
+        name,
+        make_fetch(name, authorize, columns),
+        derive=derive,
+        patch=patch,
+        use_snapshot=uses_snapshot(),
+        columns=columns,
+    )
+
+
+# ------------------------
+# 단어 추출 함수
+# ------------------------
+def get_exam_words(index, day, word_per_day):
+    """
+    index: build_vocab_index()로 만든 단어 인덱스
+    day: 시험 Day (정수)
+    word_per_day: 하루에 외울 단어 수
+    """
+    words = index["words"]
+    offsets = index["day_offsets"].get(word_per_day)
+    if offsets is None:
+        offsets = get_day_offsets(index["row_offsets"], word_per_day)
+
+    def get_day_words(d):
+        if d <= 0 or d >= len(offsets):
+            return []
+        return words[offsets[d - 1]:offsets[d]]
+
+    # 복습 주기에 따라 함께 출제할 Day (미리 만들어 둔 일정표에서 찾는다)
+    all_days = [d for d in get_review_days(day) if d < index["n_rows"] / word_per_day]
+
+    all_words = []
+    day_word_counts = {}
+    for d in all_days:
+        day_words = get_day_words(d)
+        all_words.extend(day_words)
+        day_word_counts[d] = len(day_words)
+
+    return all_words, day_word_counts
+
+
+def get_marker_exam_words(df, day_markers, day):
+    """
+    df: DataFrame (단어 목록, index = 0부터 시작)
+    day_markers: build_day_markers()로 만든 {day: (start_row, end_row)}
+    day: 시험 Day (정수)
+    """
+
+    def get_day_words(d):
+        if d not in day_markers:
+            return []
+        start_idx, end_idx = day_markers[d]
+        return [word for row_words in iter_row_words(df.iloc[start_idx:end_idx]) for word in row_words]
+
+    # 복습 주기에 따라 함께 출제할 Day (미리 만들어 둔 일정표에서 찾는다)
+    all_days = get_review_days(day)
+
+    all_words = []
+    day_word_counts = {}
+    for d in all_days:
+        day_words = get_day_words(d)
+        all_words.extend(day_words)
+        day_word_counts[d] = len(day_words)
+
+    return all_words, day_word_counts
+
+
+def shuffle_exam_words(words, seed=None):
+    """seed가 같으면 같은 순서로 섞은 새 목록을 반환"""
+    words = list(words)
+    random.Random(seed).shuffle(words)
+    return words
+
+
+# ------------------------
+# 여러 Day 시험지 묶음
+# ------------------------
+def build_exam_pack(index, first_day, last_day, word_per_day, seed=None):
+    """
+    first_day ~ last_day의 시험지를 [(day, 섞은 단어, day_word_counts)]로 반환 (write_exam_pack()에 넘긴다)
+    단어가 없는 Day는 건너뛰고, seed가 같으면 같은 순서로 섞는다
+    """
+    return _build_pack(
+        first_day, last_day, lambda d: get_exam_words(index, d, word_per_day), seed
+    )
+
+
+def build_marker_exam_pack(df, day_markers, first_day, last_day, seed=None):
+    """"참고 사항"의 dayN 표시로 Day를 나누는 시트(hyrun)용 build_exam_pack()"""
+    return _build_pack(
+        first_day, last_day, lambda d: get_marker_exam_words(df, day_markers, d), seed
+    )
+
+
+def _build_pack(first_day, last_day, get_words, seed):
+    if first_day > last_day:
+        raise ValueError(f"시작 Day({first_day})가 끝 Day({last_day})보다 큽니다.")
+    exams = []
+    for day in range(first_day, last_day + 1):
+        words, day_word_counts = get_words(day)
+        if words:
+            day_seed = None if seed is None else f"{seed}:{day}"
+            exams.append((day, shuffle_exam_words(words, day_seed), day_word_counts))
+    return exams
+
+
+# ------------------------
+# 미리보기 마크다운 표 생성 함수
+# ------------------------
+def make_markdown_table(words):
+    data = build_two_column_data(words)
+    # 헤더 행 추가
+    md = "| " + " | ".join(data[0]) + " |\n"
+    md += "|" + " --- |" * len(data[0]) + "\n"
+
+    # 본문 행
+    for row in data[1:]:
+        md += "| " + " | ".join(str(x) for x in row) + " |\n"
+
+    return md
+
+
+# ------------------------
+# 명령줄
+# ------------------------
+def parse_days(text):
+    """Day 문자열을 목록으로 ("50" -> [50], "1-60" -> [1, ..., 60])"""
+    first, _, last = text.partition("-")
+    first, last = int(first), int(last or first)
+    if first <= 0 or last < first:
+        raise argparse.ArgumentTypeError(f"올바른 Day 범위가 아닙니다: {text}")
+    return list(range(first, last + 1))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="voca_exam", description="누적 복습 시험지 PDF 만들기")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--day", type=int, help="시험 Day")
+    target.add_argument("--days", type=parse_days, help="여러 Day를 한 번에 (예: 1-60)")
+    parser.add_argument("--per-day", type=int, default=20, choices=WORDS_PER_DAY_OPTIONS, help="하루 단어 수")
+    parser.add_argument("-o", "--output", required=True, help="저장할 파일 (--days면 .zip 또는 .pdf)")
+    parser.add_argument("--message", default="오늘도 화이팅!", help="응원 메시지")
+    parser.add_argument("--seed", type=int, help="단어를 섞는 seed (같으면 같은 시험지)")
+    parser.add_argument("--sheet", default="voca_data_m", help="Google Sheets 파일 이름")
+    parser.add_argument("--key-file", help="서비스 계정 키 파일 (없으면 GOOGLE_APPLICATION_CREDENTIALS)")
+    parser.add_argument("--renderer", choices=["platypus", "canvas"], help="PDF 렌더러")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    authorize = authorize_from_env
+    if args.key_file:
+        authorize = lambda: authorize_from_file(args.key_file)
+    try:
+        _, index = load_vocab(args.sheet, authorize)
+    except MissingCredentialsError:
+        print("GOOGLE_APPLICATION_CREDENTIALS 환경 변수나 --key-file이 필요합니다.", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"데이터 로드 오류: {e}", file=sys.stderr)
+        return 1
+
+    if args.day is not None:
+        words, day_word_counts = get_exam_words(index, args.day, args.per_day)
+        if not words:
+            print(f"Day{args.day}의 단어가 없습니다.", file=sys.stderr)
+            return 1
+        words = shuffle_exam_words(words, args.seed)
+        pdf = make_pdf(words, day_word_counts, args.message, renderer=args.renderer)
+        with open(args.output, "wb") as f:
+            f.write(pdf.getvalue())
+        print(args.output)
+        return 0
+
+    fmt = os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in PACK_FORMATS:
+        print(f"--days의 출력 파일은 {', '.join(PACK_FORMATS)} 중 하나여야 합니다.", file=sys.stderr)
+        return 1
+    try:
+        exams = build_exam_pack(index, args.days[0], args.days[-1], args.per_day, args.seed)
+        write_exam_pack(exams, args.output, args.message, fmt=fmt)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
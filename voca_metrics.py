@@ -0,0 +1,220 @@
+"""
+Prometheus 형식 지표 (시험지 생성량, PDF 렌더 시간, 데이터 조회, 캐시 적중)
+
+프로세스 안에 지표를 모아 두고 별도 포트(VOCA_METRICS_PORT)의 /metrics에서
+텍스트 형식으로 내보낸다. Cloud Run에서는 사이드카 수집기가 localhost로 긁어 간다.
+"""
+import logging
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from exam_pdf import get_pdf_cache_stats, get_render_job_stats
+from voca_data import get_stats, get_store_names
+from voca_events import add_listener, get_event_stats
+
+# 0이면 서버를 띄우지 않는다
+METRICS_PORT = int(os.environ.get("VOCA_METRICS_PORT", 9100))
+# 초 단위 히스토그램 구간
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+WORDS_BUCKETS = (25, 50, 100, 150, 200, 300, 400, 600, 800)
+
+_metrics = {}  # {이름: {"type", "help", "buckets", "values": {라벨 튜플: 값}}}
+_metrics_lock = threading.Lock()
+
+
+# ------------------------
+# 지표 등록과 기록
+# ------------------------
+def counter(name, help_text):
+    _metrics[name] = {"type": "counter", "help": help_text, "buckets": None, "values": {}}
+
+
+def histogram(name, help_text, buckets=SECONDS_BUCKETS):
+    _metrics[name] = {"type": "histogram", "help": help_text, "buckets": buckets, "values": {}}
+
+
+def inc(name, n=1, /, **labels):
+    key = tuple(sorted(labels.items()))
+    with _metrics_lock:
+        values = _metrics[name]["values"]
+        values[key] = values.get(key, 0) + n
+
+
+def observe(name, value, /, **labels):
+    key = tuple(sorted(labels.items()))
+    with _metrics_lock:
+        metric = _metrics[name]
+        # [구간별 개수..., 합계, 개수]
+        values = metric["values"].setdefault(key, [0] * len(metric["buckets"]) + [0.0, 0])
+        for i, upper in enumerate(metric["buckets"]):
+            if value <= upper:
+                values[i] += 1
+                break
+        values[-2] += value
+        values[-1] += 1
+
+
+counter("voca_exam_generations_total", "만든 시험지 수 (kind: preview, pdf, variants, pack, roster)")
+histogram("voca_exam_words", "시험지 한 장의 단어 수", WORDS_BUCKETS)
+histogram("voca_pdf_render_seconds", "PDF를 받기까지 걸린 시간 (cache: hit, body, miss)")
+histogram("voca_stage_seconds", "요청 경로의 단계별 소요 시간 (stage: load_data, get_exam_words, ...)")
+histogram("voca_data_fetch_seconds", "백그라운드 시트 조회 시간, 재시도 포함 (name, outcome: ok, error)")
+counter("voca_data_fetch_total", "백그라운드 시트 조회 수 (name, outcome: ok, error / sync: full, append, unchanged)")
+
+# 사용자 행동 이벤트 -> 시험지 종류
+GENERATION_EVENTS = {
+    "exam_preview_generated": "preview",
+    "exam_pdf_generated": "pdf",
+    "exam_variants_generated": "variants",
+    "exam_pack_generated": "pack",
+    "exam_roster_generated": "roster",
+}
+
+
+def observe_stage(stage, fields):
+    """voca_events.timed()로 잰 단계를 지표에 반영"""
+    seconds = fields["ms"] / 1000
+    if stage == "data_fetch":
+        # 캐시를 읽기만 하는 요청 경로의 load_data가 아니라 실제 시트 조회
+        outcome = fields["outcome"]
+        inc("voca_data_fetch_total", name=fields["store"], outcome=outcome, sync=fields.get("sync", ""))
+        observe("voca_data_fetch_seconds", seconds, name=fields["store"], outcome=outcome)
+        return
+    observe("voca_stage_seconds", seconds, stage=stage)
+    if stage == "get_exam_words":
+        observe("voca_exam_words", fields.get("words", 0))
+    elif stage == "make_pdf" and "pages" in fields:
+        observe("voca_pdf_render_seconds", seconds, cache=fields.get("cache", "miss"))
+
+
+def count_event(event_name, event_params):
+    kind = GENERATION_EVENTS.get(event_name)
+    if kind:
+        inc("voca_exam_generations_total", kind=kind)
+
+
+add_listener("stage", observe_stage)
+add_listener("event", count_event)
+
+
+# ------------------------
+# 텍스트 형식으로 내보내기
+# ------------------------
+def format_labels(labels):
+    if not labels:
+        return ""
+    escaped = [
+        (key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    ]
+    return "{" + ",".join(f'{key}="{value}"' for key, value in escaped) + "}"
+
+
+def format_value(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def get_collected_metrics():
+    """다른 모듈의 누적 카운터를 긁는 시점에 읽어 [(이름, 종류, 설명, {라벨 튜플: 값})]으로 반환"""
+    pdf_cache = get_pdf_cache_stats()
+    render_jobs = get_render_job_stats()
+    events = get_event_stats()
+    store_stats = {name: get_stats(name) for name in get_store_names()}
+
+    def per_store(key):
+        return {(("name", name),): stats[key] for name, stats in store_stats.items()}
+
+    return [
+        ("voca_pdf_cache_requests_total", "counter", "렌더 캐시 조회 수 (result: hit, miss)",
+         {(("result", "hit"),): pdf_cache["hits"], (("result", "miss"),): pdf_cache["misses"]}),
+        ("voca_pdf_cache_evictions_total", "counter", "렌더 캐시에서 밀려난 PDF 수",
+         {(): pdf_cache["evictions"]}),
+        ("voca_pdf_cache_bytes", "gauge", "렌더 캐시가 쓰는 바이트 수", {(): pdf_cache["bytes"]}),
+        ("voca_pdf_cache_entries", "gauge", "렌더 캐시 항목 수", {(): pdf_cache["entries"]}),
+        ("voca_render_jobs_total", "counter", "세션별 PDF 작업 (result: requested, superseded, cancelled, delivered)",
+         {(("result", key),): render_jobs[key] for key in ("requested", "superseded", "cancelled", "delivered")}),
+        ("voca_data_fetches_total", "counter", "실제로 시작된 시트 조회 수", per_store("fetches")),
+        ("voca_data_coalesced_waits_total", "counter", "진행 중인 조회를 기다린 요청 수", per_store("coalesced_waits")),
+        ("voca_data_retries_total", "counter", "백오프 후 재시도 수", per_store("retries")),
+        ("voca_data_quota_errors_total", "counter", "429 응답 수", per_store("quota_errors")),
+        ("voca_data_failures_total", "counter", "재시도 후에도 실패한 조회 수", per_store("failures")),
+        ("voca_data_frame_bytes", "gauge", "현재 DataFrame의 메모리 사용량", per_store("df_bytes")),
+        ("voca_events_total", "counter", "사용자 행동 로그 (result: written, dropped, sampled_out)",
+         {(("result", key),): events[key] for key in ("written", "dropped", "sampled_out")}),
+    ]
+
+
+def render_metrics():
+    lines = []
+    with _metrics_lock:
+        metrics = [
+            (name, m["type"], m["help"], m["buckets"], {k: list(v) if isinstance(v, list) else v for k, v in m["values"].items()})
+            for name, m in _metrics.items()
+        ]
+    for name, kind, help_text, buckets, values in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in values.items():
+            if kind != "histogram":
+                lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+                continue
+            cumulative = 0
+            for upper, count in zip(buckets, value):
+                cumulative += count
+                le = format_labels(labels + (("le", format_value(upper)),))
+                lines.append(f"{name}_bucket{le} {cumulative}")
+            lines.append(f"{name}_bucket{format_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+            lines.append(f"{name}_sum{format_labels(labels)} {format_value(value[-2])}")
+            lines.append(f"{name}_count{format_labels(labels)} {value[-1]}")
+
+    for name, kind, help_text, values in get_collected_metrics():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in values.items():
+            lines.append(f"{name}{format_labels(labels)} {format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ------------------------
+# /metrics 서버
+# ------------------------
+_server = None
+_server_lock = threading.Lock()
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_metrics().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # 긁어 갈 때마다 접근 로그를 남기지 않는다
+        pass
+
+
+def start_metrics_server():
+    """프로세스당 한 번 /metrics 서버를 백그라운드 스레드로 띄운다 (이후 호출은 바로 반환)"""
+    global _server
+    if METRICS_PORT <= 0 or _server is not None:
+        return
+    with _server_lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer(("0.0.0.0", METRICS_PORT), MetricsHandler)
+        except OSError as e:
+            # 같은 호스트에서 앱을 여러 개 띄워 포트가 겹치면 지표 없이 계속한다
+            logging.warning(f"지표 서버를 시작하지 못했습니다 (포트 {METRICS_PORT}): {e}")
+            _server = False
+            return
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="voca-metrics", daemon=True).start()
+        logging.info(f"지표 서버 시작: :{METRICS_PORT}/metrics")